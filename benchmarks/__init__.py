@@ -0,0 +1 @@
+"""Benchmarks for the Otodata Tank Monitor integration."""
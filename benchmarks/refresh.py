@@ -0,0 +1,282 @@
+"""Scaling benchmark for the tank coordinator and sensor platform.
+
+Drives OtodataUpdateCoordinator and the sensors in sensor.py against a local
+stand-in of the Otodata API (see standin.py) with 1, 100, 1,000 and 10,000
+tanks, and prints one JSON document with the results.
+
+Needs Home Assistant's test helpers; run from the repository root:
+
+    pip install pytest-homeassistant-custom-component
+    python -m benchmarks.refresh --output bench_output.json
+
+Per size it reports:
+
+- fetch_decode_ms: one GetAllDisplayPropaneDevices request, streamed and parsed
+- first_refresh_ms: platform setup up to the first snapshot
+- entity_add_ms: adding every entity, including its first state write
+- refresh_ms: a refresh in which every tank has a new reading
+- state_write_ms: the entity state writes within that refresh
+- loop_block_ms: time that refresh held the event loop (coordinator.loop_time)
+- max_loop_lag_ms: the worst delay seen by a 1 ms timer during that refresh
+- unchanged_refresh_ms: a refresh in which no tank changed
+- bytes_per_entity: memory allocated by setup, divided by the entities created
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterable
+from contextlib import suppress
+from datetime import timedelta
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import EntityPlatform
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.otodata_tank_monitor import sensor
+from custom_components.otodata_tank_monitor.account import async_get_account
+from custom_components.otodata_tank_monitor.api import (
+    OtodataApiClient,
+    async_get_api_session,
+)
+from custom_components.otodata_tank_monitor.const import (
+    DOMAIN,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+)
+from custom_components.otodata_tank_monitor.coordinator import OtodataUpdateCoordinator
+
+from .standin import OtodataStandIn, make_devices
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1, 100, 1000, 10000)
+
+
+class LoopLagProbe:
+    """Record how late the event loop wakes up a short, repeating sleep."""
+
+    def __init__(self, interval: float = 0.001) -> None:
+        """Initialize the probe."""
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        """Sleep repeatedly, keeping the worst overshoot."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, loop.time() - start - self.interval)
+
+    async def __aenter__(self) -> LoopLagProbe:
+        """Start probing."""
+        self._task = asyncio.create_task(self._run())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop probing."""
+        assert self._task is not None
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+
+def _ms(seconds: float) -> float:
+    """Return seconds as rounded milliseconds."""
+    return round(seconds * 1000, 3)
+
+
+def _entry(hass: HomeAssistant, name: str) -> MockConfigEntry:
+    """Add a config entry for the benchmark to Home Assistant."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=name,
+        data={CONF_USERNAME: name, CONF_PASSWORD: "bench"},
+        state=ConfigEntryState.SETUP_IN_PROGRESS,
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _async_setup_sensors(
+    hass: HomeAssistant, entry: MockConfigEntry, standin: OtodataStandIn
+) -> tuple[EntityPlatform, list[Entity]]:
+    """Run the sensor platform setup against the stand-in; return its entities."""
+    # Point the entry's shared account at the stand-in. The client has no
+    # host rate limiter, which would otherwise pace sequential refreshes.
+    account = async_get_account(hass, entry.data)
+    account.client = OtodataApiClient(
+        async_get_api_session(hass),
+        entry.data[CONF_USERNAME],
+        entry.data[CONF_PASSWORD],
+        url=standin.url,
+    )
+
+    entity_platform = EntityPlatform(
+        hass=hass,
+        logger=_LOGGER,
+        domain="sensor",
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=30),
+        entity_namespace=None,
+    )
+    entity_platform.config_entry = entry
+    created: list[Entity] = []
+
+    def add_entities(entities: Iterable[Entity], update_before_add: bool = False) -> None:
+        created.extend(entities)
+
+    await sensor.async_setup_entry(hass, entry, add_entities)
+    return entity_platform, created
+
+
+async def _async_refresh(coordinator: OtodataUpdateCoordinator) -> float:
+    """Refresh from the API, bypassing the account's short cache."""
+    for account in coordinator.accounts:
+        account._fetched_at = 0.0  # pylint: disable=protected-access
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    return time.perf_counter() - start
+
+
+async def async_bench_size(
+    hass: HomeAssistant, standin: OtodataStandIn, tanks: int, repeat: int
+) -> dict[str, Any]:
+    """Benchmark one fleet size."""
+    response_bytes = standin.set_devices(make_devices(tanks))
+
+    client = OtodataApiClient(
+        async_get_api_session(hass), "bench", "bench", url=standin.url
+    )
+    fetch: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await client.async_get_devices()
+        fetch.append(time.perf_counter() - start)
+
+    entry = _entry(hass, f"bench-{tanks}")
+    start = time.perf_counter()
+    entity_platform, entities = await _async_setup_sensors(hass, entry, standin)
+    first_refresh = time.perf_counter() - start
+    start = time.perf_counter()
+    await entity_platform.async_add_entities(entities)
+    entity_add = time.perf_counter() - start
+    coordinator: OtodataUpdateCoordinator = entities[0].coordinator
+
+    refresh: list[float] = []
+    writes: list[float] = []
+    loop_block: list[float] = []
+    lag: list[float] = []
+    for step in range(1, repeat + 1):
+        # Every tank has a new reading, so every entity writes its state
+        standin.set_devices(make_devices(tanks, step=step))
+        async with LoopLagProbe() as probe:
+            refresh.append(await _async_refresh(coordinator))
+        writes.append(coordinator.loop_time.get("listeners", 0.0))
+        loop_block.append(sum(coordinator.loop_time.values()))
+        lag.append(probe.max_lag)
+    unchanged = await _async_refresh(coordinator)
+
+    await entity_platform.async_reset()
+    await coordinator.async_shutdown()
+
+    # Memory is measured on a second entry so tracing does not skew timings
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        memory_entry = _entry(hass, f"bench-memory-{tanks}")
+        memory_platform, memory_entities = await _async_setup_sensors(
+            hass, memory_entry, standin
+        )
+        await memory_platform.async_add_entities(memory_entities)
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    await memory_platform.async_reset()
+    await memory_entities[0].coordinator.async_shutdown()
+
+    return {
+        "tanks": tanks,
+        "entities": len(entities),
+        "response_bytes": response_bytes,
+        "fetch_decode_ms": _ms(statistics.median(fetch)),
+        "first_refresh_ms": _ms(first_refresh),
+        "entity_add_ms": _ms(entity_add),
+        "refresh_ms": _ms(statistics.median(refresh)),
+        "state_write_ms": _ms(statistics.median(writes)),
+        "loop_block_ms": _ms(statistics.median(loop_block)),
+        "max_loop_lag_ms": _ms(max(lag)),
+        "unchanged_refresh_ms": _ms(unchanged),
+        "bytes_per_entity": round(allocated / len(memory_entities)),
+    }
+
+
+async def async_main(sizes: Iterable[int], repeat: int) -> dict[str, Any]:
+    """Run the benchmark for every size."""
+    standin = OtodataStandIn()
+    await standin.start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant(config_dir=config_dir) as hass:
+                for tanks in sizes:
+                    results.append(await async_bench_size(hass, standin, tanks, repeat))
+                    print(f"{tanks} tanks done", file=sys.stderr)
+    finally:
+        await standin.stop()
+
+    return {
+        "benchmark": "otodata_refresh",
+        "python": platform.python_version(),
+        "homeassistant": HA_VERSION,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the benchmark and write its JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated tank counts (default: 1,100,1000,10000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(async_main(args.sizes, args.repeat))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Local stand-in for the Otodata API and EIA price pages.
+
+Serves synthetic GetAllDisplayPropaneDevices JSON and EIA-shaped weekly price
+pages, with optional latency and fault injection. Used by the benchmarks, or
+run on its own to load-test a Home Assistant instance:
+
+    python -m benchmarks.standin --tanks 1000 --latency 0.2 --error-rate 0.05
+
+then start Home Assistant with the printed OTODATA_API_BASE_URL and
+OTODATA_EIA_BASE_URL. Any username is accepted; the password "wrong" is
+always rejected.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import date, timedelta
+import json
+from pathlib import Path
+import random
+from typing import Any
+from urllib.parse import urlsplit
+
+from aiohttp import BasicAuth, web
+
+from custom_components.otodata_tank_monitor.const import API_URL
+
+API_PATH = urlsplit(API_URL).path
+EIA_PATH = "/dnav/pet/{page}"
+# EIA pages in their published layout: the row label sits in a nested table
+# and each row ends with a history link after the Current2 cell
+PRICE_FIXTURES = Path(__file__).parent / "fixtures"
+PRICE_LAYOUTS = ("eia", "synthetic")
+
+# Epoch milliseconds of the first synthetic reading
+BASE_READING_MS = 1_767_225_600_000
+REJECTED_PASSWORD = "wrong"
+
+
+def make_devices(
+    count: int, seed: int = 0, step: int = 0
+) -> list[dict[str, Any]]:
+    """Return ``count`` devices shaped like GetAllDisplayPropaneDevices.
+
+    ``step`` advances every tank by one daily reading, so each step changes
+    every tank. Fields the integration ignores are included on purpose.
+    """
+    rng = random.Random(seed)
+    devices = []
+    for index in range(count):
+        capacity = rng.choice((378.5, 946.4, 1892.7))
+        level = max(5, 80 - (index % 60) - step * 0.7)
+        devices.append(
+            {
+                "Id": 100000 + index,
+                "SerialNumber": f"TM5030-{index:06d}",
+                "CustomName": f"Bench Tank {index}",
+                "CompanyName": "Bench Propane",
+                "Product": "Propane",
+                "IsOwner": True,
+                "Level": round(level, 1),
+                "TankCapacity": capacity,
+                "NotifyAt1": 30,
+                "NotifyAt2": 20,
+                "TankLastPressure": round(rng.uniform(600, 900), 1),
+                "TankPressureDisplayUnitSymbol": "kPa",
+                "LastReadingDate": (
+                    f"/Date({BASE_READING_MS + step * 86_400_000 + index * 1000}-0500)/"
+                ),
+                # Unused by the integration; dropped on ingest
+                "Address": f"{index} Bench Road",
+                "Latitude": rng.uniform(35, 45),
+                "Longitude": rng.uniform(-90, -70),
+                "DeviceModel": "TM5030",
+                "FirmwareVersion": "3.1.7",
+                "BatteryLevel": rng.randint(50, 100),
+                "SignalStrength": rng.randint(-110, -60),
+                "DealerNotes": "",
+            }
+        )
+    return devices
+
+
+def load_price_fixture(page: str) -> bytes:
+    """Return the EIA-layout fixture served for ``page``.
+
+    Pages without their own fixture get the North Carolina one; the parser
+    only cares about the layout.
+    """
+    path = PRICE_FIXTURES / page
+    if not path.is_file():
+        path = PRICE_FIXTURES / "eia_pet_pri_wfr_dcus_snc_w.htm"
+    return path.read_bytes()
+
+
+def make_price_page(region: str, today: date | None = None, weeks: int = 6) -> str:
+    """Return a synthetic weekly residential propane page for ``region``.
+
+    Week dates in the header, then a flat DataRow whose last cell (Current2)
+    is this week's price. Prices and dates follow the calendar, unlike the
+    fixtures in PRICE_FIXTURES. Filler rows follow so early termination has
+    something to skip.
+    """
+    rng = random.Random(region)
+    today = today or date.today()
+    # EIA dates its weekly prices on Mondays
+    latest = today - timedelta(days=today.weekday())
+    dates = [latest - timedelta(weeks=offset) for offset in range(weeks - 1, -1, -1)]
+    price = rng.uniform(2.2, 3.6)
+    prices = []
+    for _ in dates:
+        price += rng.uniform(-0.05, 0.05)
+        prices.append(round(price, 3))
+
+    header = "".join(
+        f'<th class="Series5">{week:%m/%d/%y}</th>' for week in dates
+    )
+    cells = "".join(f'<td class="DataB">{value:.3f}</td>' for value in prices[:-1])
+    filler = "".join(
+        f'<tr><td class="DataStub">Filler {row}</td>{"<td>-</td>" * weeks}</tr>'
+        for row in range(200)
+    )
+    return (
+        "<html><head><title>Weekly Heating Oil and Propane Prices</title></head><body>"
+        f'<table class="data1"><tr><th class="Series1">Area</th>{header}</tr>'
+        f'<tr class="DataRow"><td class="DataStub1">{region} Propane Residential</td>'
+        f'{cells}<td class="Current2">{prices[-1]:.3f}</td></tr>'
+        f"{filler}</table></body></html>"
+    )
+
+
+@dataclass
+class Faults:
+    """What goes wrong, and how slowly, when the stand-in answers."""
+
+    latency: float = 0.0  # seconds before every response
+    error_rate: float = 0.0  # share of requests answered with a 503
+    auth_error_rate: float = 0.0  # share of requests answered with a 401
+    timeout_rate: float = 0.0  # share of requests left hanging for ``hang``
+    hang: float = 120.0  # seconds a hanging request waits before closing
+    chunk_size: int = 0  # stream bodies in chunks of this size; 0 sends at once
+    chunk_delay: float = 0.0  # seconds between body chunks
+
+
+class OtodataStandIn:
+    """aiohttp server answering like the Otodata API and EIA price pages."""
+
+    def __init__(
+        self,
+        faults: Faults | None = None,
+        seed: int | None = None,
+        price_layout: str = "eia",
+    ) -> None:
+        """Initialize the server."""
+        self.faults = faults or Faults()
+        self.price_layout = price_layout
+        self._rng = random.Random(seed)
+        self._body = b"[]"
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        """Return the device list URL."""
+        return f"{self.base_url}{API_PATH}"
+
+    def price_url(self, page: str = "pet_pri_wfr_dcus_snc_w.htm") -> str:
+        """Return the URL of an EIA price page."""
+        return f"{self.base_url}{EIA_PATH.format(page=page)}"
+
+    def set_devices(self, devices: list[dict[str, Any]]) -> int:
+        """Serve ``devices`` from now on; return the encoded size in bytes."""
+        self._body = json.dumps(devices).encode()
+        return len(self._body)
+
+    async def _async_fault(self) -> web.Response | None:
+        """Wait out the latency and return an injected failure, if any."""
+        faults = self.faults
+        if faults.latency:
+            await asyncio.sleep(faults.latency)
+        roll = self._rng.random()
+        if roll < faults.timeout_rate:
+            await asyncio.sleep(faults.hang)
+            return web.Response(status=504)
+        roll -= faults.timeout_rate
+        if roll < faults.error_rate:
+            return web.Response(status=503, text="Service Unavailable")
+        roll -= faults.error_rate
+        if roll < faults.auth_error_rate:
+            return web.Response(status=401)
+        return None
+
+    async def _async_send(
+        self, request: web.Request, body: bytes, content_type: str
+    ) -> web.StreamResponse:
+        """Send a body at once, or in slow chunks when configured."""
+        if not self.faults.chunk_size:
+            return web.Response(body=body, content_type=content_type)
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(body), self.faults.chunk_size):
+            await response.write(body[start : start + self.faults.chunk_size])
+            if self.faults.chunk_delay:
+                await asyncio.sleep(self.faults.chunk_delay)
+        await response.write_eof()
+        return response
+
+    async def _handle_devices(self, request: web.Request) -> web.StreamResponse:
+        """Answer a device list request."""
+        self.requests += 1
+        try:
+            auth = BasicAuth.decode(request.headers.get("Authorization", ""))
+        except ValueError:
+            return web.Response(status=401)
+        if auth.password == REJECTED_PASSWORD:
+            return web.Response(status=401)
+        if (failure := await self._async_fault()) is not None:
+            return failure
+        return await self._async_send(request, self._body, "application/json")
+
+    async def _handle_price(self, request: web.Request) -> web.StreamResponse:
+        """Answer an EIA price page request."""
+        self.requests += 1
+        if (failure := await self._async_fault()) is not None:
+            return failure
+        page = request.match_info["page"]
+        if self.price_layout == "eia":
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, load_price_fixture, f"eia_{page}"
+            )
+        else:
+            body = make_price_page(page).encode()
+        return await self._async_send(request, body, "text/html")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start listening; port 0 picks a free one."""
+        app = web.Application()
+        app.router.add_get(API_PATH, self._handle_devices)
+        app.router.add_get(EIA_PATH, self._handle_price)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{bound_host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def async_serve(args: argparse.Namespace) -> None:
+    """Serve until interrupted, advancing readings on an interval if asked."""
+    standin = OtodataStandIn(
+        Faults(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            auth_error_rate=args.auth_error_rate,
+            timeout_rate=args.timeout_rate,
+            hang=args.hang,
+            chunk_size=args.chunk_size,
+            chunk_delay=args.chunk_delay,
+        ),
+        seed=args.seed,
+        price_layout=args.price_layout,
+    )
+    standin.set_devices(make_devices(args.tanks, seed=args.seed or 0))
+    await standin.start(args.host, args.port)
+    print(f"OTODATA_API_BASE_URL={standin.base_url}")
+    print(f"OTODATA_EIA_BASE_URL={standin.base_url}")
+    try:
+        step = 0
+        while True:
+            await asyncio.sleep(args.step_interval or 3600)
+            if args.step_interval:
+                step += 1
+                standin.set_devices(make_devices(args.tanks, seed=args.seed or 0, step=step))
+    finally:
+        await standin.stop()
+
+
+def main() -> None:
+    """Run the stand-in from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--tanks", type=int, default=10, help="fleet size")
+    parser.add_argument("--seed", type=int, help="seed for data and fault injection")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503s")
+    parser.add_argument("--auth-error-rate", type=float, default=0.0, help="share of 401s")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="share of hung requests")
+    parser.add_argument("--hang", type=float, default=120.0, help="seconds a hung request waits")
+    parser.add_argument("--chunk-size", type=int, default=0, help="stream bodies in chunks")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between chunks")
+    parser.add_argument(
+        "--price-layout",
+        choices=PRICE_LAYOUTS,
+        default="eia",
+        help="serve the EIA-layout fixtures or synthetic pages with current dates",
+    )
+    parser.add_argument(
+        "--step-interval",
+        type=float,
+        default=0.0,
+        help="seconds between new readings for every tank (0 keeps them fixed)",
+    )
+    try:
+        asyncio.run(async_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
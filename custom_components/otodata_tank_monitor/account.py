@@ -0,0 +1,233 @@
+"""Shared Nee-Vo account access for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Mapping
+import hashlib
+import logging
+import random
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import (
+    OtodataApiClient,
+    OtodataCircuitOpenError,
+    OtodataConnectionError,
+    OtodataNoDevicesError,
+    OtodataRateLimitedError,
+    async_get_api_session,
+    async_get_circuit_breaker,
+    async_get_rate_limiter,
+)
+from .const import (
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_ACCOUNTS,
+    API_HOST,
+    API_RETRY_ATTEMPTS,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    ACCOUNT_CACHE_TTL,
+    VALIDATION_CACHE_TTL,
+    DATA_ACCOUNTS,
+    DATA_VALIDATED_DEVICES,
+)
+from .metrics import FetchStats
+
+_LOGGER = logging.getLogger(__name__)
+
+DevicesListener = Callable[[list[dict[str, Any]]], None]
+
+
+def account_key(username: str, password: str) -> str:
+    """Return the registry key for a set of credentials."""
+    # Hash so the registry never holds the password as a dict key
+    return hashlib.sha256(f"{username.lower()}\0{password}".encode()).hexdigest()
+
+
+def entry_credentials(
+    data: Mapping[str, Any], options: Mapping[str, Any]
+) -> list[dict[str, str]]:
+    """Return the distinct credential sets of a config entry.
+
+    The entry's own account comes first, followed by any additional fleet
+    accounts from the options.
+    """
+    credentials: dict[str, dict[str, str]] = {}
+    for item in (data, *options.get(CONF_ACCOUNTS, ())):
+        creds = {CONF_USERNAME: item[CONF_USERNAME], CONF_PASSWORD: item[CONF_PASSWORD]}
+        credentials.setdefault(account_key(creds[CONF_USERNAME], creds[CONF_PASSWORD]), creds)
+    return list(credentials.values())
+
+
+@callback
+def async_cache_validated_devices(
+    hass: HomeAssistant, data: dict[str, Any], devices: list[dict[str, Any]]
+) -> None:
+    """Keep the config flow's device list so the first refresh can reuse it."""
+    cache: dict[str, tuple[float, list[dict[str, Any]]]] = hass.data.setdefault(
+        DATA_VALIDATED_DEVICES, {}
+    )
+    now = time.monotonic()
+    # Drop handoffs from flows that never created an entry
+    for key in [k for k, (t, _) in cache.items() if now - t >= VALIDATION_CACHE_TTL]:
+        cache.pop(key)
+    cache[account_key(data[CONF_USERNAME], data[CONF_PASSWORD])] = (now, devices)
+
+
+@callback
+def async_get_account(hass: HomeAssistant, data: Mapping[str, Any]) -> OtodataAccount:
+    """Return the shared account for the credentials in a config entry."""
+    accounts: dict[str, OtodataAccount] = hass.data.setdefault(DATA_ACCOUNTS, {})
+    key = account_key(data[CONF_USERNAME], data[CONF_PASSWORD])
+    if (account := accounts.get(key)) is None:
+        account = accounts[key] = OtodataAccount(
+            hass, key, data[CONF_USERNAME], data[CONF_PASSWORD]
+        )
+    return account
+
+
+class OtodataAccount:
+    """One Nee-Vo account shared by every config entry that uses it.
+
+    Concurrent fetches share a single in-flight request, and each successful
+    response is cached briefly and pushed to every other registered listener so
+    their coordinators stay in phase instead of polling on their own.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, key: str, username: str, password: str
+    ) -> None:
+        """Initialize the account."""
+        self.hass = hass
+        self.key = key
+        self.client = OtodataApiClient(
+            async_get_api_session(hass),
+            username,
+            password,
+            limiter=async_get_rate_limiter(hass, API_HOST),
+            breaker=async_get_circuit_breaker(hass, API_HOST),
+        )
+        self._inflight: asyncio.Task[list[dict[str, Any]]] | None = None
+        self._waiters: set[object] = set()
+        self._devices: list[dict[str, Any]] | None = None
+        self._fetched_at = 0.0
+        self._listeners: dict[object, DevicesListener] = {}
+        # Cost of the latest request to the API, for refresh metrics
+        self.last_fetch: FetchStats | None = None
+
+    @callback
+    def async_add_listener(self, owner: object, listener: DevicesListener) -> Callable[[], None]:
+        """Register a listener for fresh device lists; return a remove callback."""
+        self._listeners[owner] = listener
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.pop(owner, None)
+            if not self._listeners:
+                accounts = self.hass.data.get(DATA_ACCOUNTS, {})
+                if accounts.get(self.key) is self:
+                    accounts.pop(self.key)
+
+        return remove_listener
+
+    async def async_get_devices(self, requester: object | None = None) -> list[dict[str, Any]]:
+        """Return the account's device list, sharing requests and recent results."""
+        if (devices := self._async_take_validated_devices()) is not None:
+            return devices
+        if (
+            self._devices is not None
+            and time.monotonic() - self._fetched_at < ACCOUNT_CACHE_TTL
+        ):
+            return self._devices
+
+        if self._inflight is None:
+            self._inflight = self.hass.async_create_task(self._async_fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        if requester is not None:
+            self._waiters.add(requester)
+
+        # Shield so one cancelled waiter does not cancel the request for the rest
+        return await asyncio.shield(self._inflight)
+
+    @callback
+    def _async_take_validated_devices(self) -> list[dict[str, Any]] | None:
+        """Adopt a device list the config flow fetched moments ago, once."""
+        cache = self.hass.data.get(DATA_VALIDATED_DEVICES)
+        if not cache or (handoff := cache.pop(self.key, None)) is None:
+            return None
+        fetched_at, devices = handoff
+        if time.monotonic() - fetched_at >= VALIDATION_CACHE_TTL:
+            return None
+        _LOGGER.debug("Seeding first refresh from config flow validation")
+        self._devices = devices
+        self._fetched_at = fetched_at
+        return devices
+
+    @callback
+    def _clear_inflight(self, task: asyncio.Task) -> None:
+        """Forget a finished request."""
+        if self._inflight is task:
+            self._inflight = None
+            self._waiters = set()
+
+    async def _async_fetch(self) -> list[dict[str, Any]]:
+        """Fetch the device list and fan it out to other listeners."""
+        try:
+            devices = await self._async_get_devices_with_retry()
+        except OtodataNoDevicesError:
+            # Not an error once set up; the account simply has no tanks now
+            devices = []
+
+        self._devices = devices
+        self._fetched_at = time.monotonic()
+
+        # Waiters get the result directly; push it to everyone else
+        for owner, listener in list(self._listeners.items()):
+            if owner not in self._waiters:
+                listener(devices)
+
+        return devices
+
+    async def _async_get_devices_with_retry(self) -> list[dict[str, Any]]:
+        """Fetch the device list, retrying transient errors with backoff."""
+        stats = self.last_fetch = FetchStats()
+        attempt = 1
+        while True:
+            try:
+                return await self._async_get_devices_once(stats)
+            except OtodataCircuitOpenError:
+                raise
+            except (OtodataConnectionError, OtodataRateLimitedError) as err:
+                if attempt >= API_RETRY_ATTEMPTS:
+                    raise
+                # Full jitter keeps entries that failed together from
+                # retrying together
+                delay = random.uniform(0, API_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                if isinstance(err, OtodataRateLimitedError) and err.retry_after:
+                    delay = max(delay, err.retry_after)
+                if delay > API_RETRY_MAX_DELAY:
+                    raise
+                _LOGGER.debug(
+                    "Retrying Otodata request in %.1fs (attempt %s): %s",
+                    delay,
+                    attempt,
+                    err,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+                stats.retries += 1
+
+    async def _async_get_devices_once(self, stats: FetchStats) -> list[dict[str, Any]]:
+        """Make one request, adding its cost to ``stats``."""
+        client = self.client
+        try:
+            return await client.async_get_devices()
+        finally:
+            decode = client.last_decode_duration or 0.0
+            stats.request += (client.last_request_duration or 0.0) - decode
+            stats.decode += decode
+            stats.bytes += client.last_response_bytes or 0
+            stats.finished = time.monotonic()
@@ -0,0 +1,443 @@
+"""Async client for the Otodata (Nee-Vo) API."""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import logging
+import time
+from typing import Any
+
+import aiohttp
+import async_timeout
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.ssl import get_default_context
+
+from .const import (
+    API_URL,
+    API_TIMEOUT,
+    API_POOL_LIMIT,
+    API_POOL_LIMIT_PER_HOST,
+    API_KEEPALIVE_TIMEOUT,
+    API_DNS_CACHE_TTL,
+    API_EXECUTOR_DECODE_BYTES,
+    API_CHUNK_SIZE,
+    API_RATE_LIMIT,
+    API_MAX_IN_FLIGHT,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    DATA_SESSION,
+    DATA_RATE_LIMITERS,
+    DATA_CIRCUIT_BREAKERS,
+)
+from .models import project_device
+
+_LOGGER = logging.getLogger(__name__)
+
+REQUEST_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+WHITESPACE = json.decoder.WHITESPACE
+
+
+class OtodataApiError(HomeAssistantError):
+    """Base error for Otodata API failures."""
+
+
+class OtodataAuthError(OtodataApiError):
+    """Error to indicate the credentials were rejected."""
+
+
+class OtodataConnectionError(OtodataApiError):
+    """Error to indicate the API could not be reached or answered badly."""
+
+
+class OtodataNoDevicesError(OtodataApiError):
+    """Error to indicate the account has no devices."""
+
+
+class OtodataRateLimitedError(OtodataApiError):
+    """Error to indicate the API asked us to slow down."""
+
+    def __init__(self, retry_after: float | None = None) -> None:
+        """Initialize the error."""
+        super().__init__(f"Rate limited by Otodata API (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class OtodataCircuitOpenError(OtodataConnectionError):
+    """Error to indicate requests are paused after repeated failures."""
+
+    def __init__(self, retry_in: float) -> None:
+        """Initialize the error."""
+        super().__init__(
+            f"Otodata API is failing; pausing requests for {retry_in:.0f}s"
+        )
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stop sending requests to a host that keeps failing.
+
+    After ``threshold`` consecutive failures the circuit opens and requests
+    fail fast. Once ``reset_timeout`` has passed one trial request is let
+    through; its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize the breaker."""
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while requests are being refused."""
+        return self._opened_at is not None
+
+    def check(self) -> bool:
+        """Raise OtodataCircuitOpenError if a request may not start now.
+
+        Return True when the request is the trial of an open circuit.
+        """
+        if self._opened_at is None:
+            return False
+        retry_in = self._opened_at + self._reset_timeout - time.monotonic()
+        if retry_in > 0 or self._trial_running:
+            raise OtodataCircuitOpenError(max(retry_in, 0))
+        self._trial_running = True
+        return True
+
+    def release_trial(self) -> None:
+        """Let another trial through after one ended without an answer."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        """Close the circuit after an answered request."""
+        if self._opened_at is not None:
+            _LOGGER.info("Otodata API is answering again")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold."""
+        self._failures += 1
+        self._trial_running = False
+        if self._opened_at is not None or self._failures >= self._threshold:
+            if self._opened_at is None:
+                _LOGGER.warning(
+                    "Otodata API failed %s times in a row; pausing requests for %ss",
+                    self._failures,
+                    self._reset_timeout,
+                )
+            self._opened_at = time.monotonic()
+
+
+class HostRateLimiter:
+    """Space out and cap the requests in flight to one upstream host.
+
+    Used as an async context manager around a request. Requests queue here,
+    before their timeout starts, rather than in the connection pool, so a
+    burst waits its turn instead of timing out.
+    """
+
+    def __init__(self, rate: float, max_in_flight: int = API_MAX_IN_FLIGHT) -> None:
+        """Initialize the limiter for ``rate`` request starts per second."""
+        self._interval = 1 / rate
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self) -> None:
+        """Wait until another request may start."""
+        await self._in_flight.acquire()
+        try:
+            async with self._lock:
+                now = time.monotonic()
+                if (wait := self._next_start - now) > 0:
+                    await asyncio.sleep(wait)
+                    now += wait
+                self._next_start = now + self._interval
+        except BaseException:
+            self._in_flight.release()
+            raise
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Let the next queued request go."""
+        self._in_flight.release()
+
+
+@callback
+def async_get_rate_limiter(
+    hass: HomeAssistant,
+    host: str,
+    rate: float = API_RATE_LIMIT,
+    max_in_flight: int = API_MAX_IN_FLIGHT,
+) -> HostRateLimiter:
+    """Return the shared rate limiter for an upstream host."""
+    limiters: dict[str, HostRateLimiter] = hass.data.setdefault(DATA_RATE_LIMITERS, {})
+    if (limiter := limiters.get(host)) is None:
+        limiter = limiters[host] = HostRateLimiter(rate, max_in_flight)
+    return limiter
+
+
+@callback
+def async_get_circuit_breaker(hass: HomeAssistant, host: str) -> CircuitBreaker:
+    """Return the shared circuit breaker for an upstream host."""
+    breakers: dict[str, CircuitBreaker] = hass.data.setdefault(DATA_CIRCUIT_BREAKERS, {})
+    if (breaker := breakers.get(host)) is None:
+        breaker = breakers[host] = CircuitBreaker()
+    return breaker
+
+
+@callback
+def async_get_api_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the integration's pooled keep-alive session, creating it once."""
+    if (session := hass.data.get(DATA_SESSION)) is not None and not session.closed:
+        return session
+
+    connector = aiohttp.TCPConnector(
+        limit=API_POOL_LIMIT,
+        limit_per_host=API_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=API_DNS_CACHE_TTL,
+        enable_cleanup_closed=True,
+        # Home Assistant's shared context: certifi CAs, loaded once
+        ssl=get_default_context(),
+    )
+    session = hass.data[DATA_SESSION] = aiohttp.ClientSession(
+        connector=connector,
+        headers=REQUEST_HEADERS,
+        auto_decompress=True,
+    )
+
+    async def _async_close_session(event: Event) -> None:
+        """Close the session when Home Assistant shuts down."""
+        await session.close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+    return session
+
+
+class DeviceStreamParser:
+    """Incrementally decode the device array, one element at a time.
+
+    Each complete device object is projected down to DEVICE_FIELDS as soon
+    as it is decoded, so only the unparsed tail of the response and the
+    trimmed devices are held in memory.
+    """
+
+    __slots__ = (
+        "_decoder",
+        "_json",
+        "_text",
+        "_pos",
+        "_started",
+        "_after_item",
+        "_done",
+        "devices",
+        "bytes_read",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._after_item = False
+        self._done = False
+        self.devices: list[dict[str, Any]] = []
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Decode every device completed by this chunk."""
+        self.bytes_read += len(chunk)
+        self._text = self._text[self._pos :] + self._decoder.decode(chunk)
+        self._pos = 0
+        self._parse(final=False)
+
+    def close(self) -> list[dict[str, Any]]:
+        """Finish parsing and return the devices; raise ValueError if malformed."""
+        self._text = self._text[self._pos :] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        self._parse(final=True)
+        if not self._done:
+            raise ValueError("Truncated device list")
+        if WHITESPACE.match(self._text, self._pos).end() != len(self._text):
+            raise ValueError("Extra data after device list")
+        return self.devices
+
+    def _parse(self, final: bool) -> None:
+        """Consume as many whole array elements as the buffer holds."""
+        text = self._text
+        pos = self._pos
+        while not self._done:
+            pos = WHITESPACE.match(text, pos).end()
+            if pos >= len(text):
+                break
+            char = text[pos]
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a list of devices")
+                self._started = True
+                pos += 1
+            elif char == "]":
+                self._done = True
+                pos += 1
+            elif self._after_item:
+                if char != ",":
+                    raise ValueError(f"Expected ',' at offset {pos}")
+                self._after_item = False
+                pos += 1
+            else:
+                try:
+                    item, pos = self._json.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    # The element continues in the next chunk
+                    break
+                self._after_item = True
+                if isinstance(item, dict):
+                    self.devices.append(project_device(item))
+        self._pos = pos
+
+
+class OtodataApiClient:
+    """Client for the GetAllDisplayPropaneDevices endpoint."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        username: str,
+        password: str,
+        timeout: float = API_TIMEOUT,
+        limiter: HostRateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        url: str = API_URL,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._url = url
+        self._limiter = limiter
+        self._breaker = breaker
+        self._auth = aiohttp.BasicAuth(username, password)
+        self._timeout = timeout
+        self.last_request_duration: float | None = None
+        self.last_decode_duration: float | None = None
+        self.last_response_bytes: int | None = None
+
+    async def async_get_devices(self) -> list[dict[str, Any]]:
+        """Return every device on the account."""
+        # Left unset if the request never starts
+        self.last_request_duration = self.last_decode_duration = None
+        self.last_response_bytes = None
+        if self._breaker is None:
+            return await self._async_get_devices_limited()
+
+        trial = self._breaker.check()
+        try:
+            devices = await self._async_get_devices_limited()
+        except (OtodataConnectionError, OtodataRateLimitedError):
+            self._breaker.record_failure()
+            raise
+        except OtodataApiError:
+            # The API answered; only the account is at fault
+            self._breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled (an unload, a shutdown) or a bug; says nothing about
+            # the host, but must not leave the circuit waiting on this trial
+            if trial:
+                self._breaker.release_trial()
+            raise
+        self._breaker.record_success()
+        return devices
+
+    async def _async_get_devices_limited(self) -> list[dict[str, Any]]:
+        """Request the device list through the host's rate limiter."""
+        if self._limiter is None:
+            return await self._async_get_devices()
+        async with self._limiter:
+            return await self._async_get_devices()
+
+    async def _async_get_devices(self) -> list[dict[str, Any]]:
+        """Request the device list."""
+        start = time.perf_counter()
+        try:
+            async with async_timeout.timeout(self._timeout):
+                async with self._session.get(
+                    self._url, auth=self._auth, headers=REQUEST_HEADERS
+                ) as response:
+                    if response.status == 401:
+                        raise OtodataAuthError("Invalid Nee-Vo credentials")
+                    if response.status == 429:
+                        raise OtodataRateLimitedError(_retry_after(response))
+                    if response.status != 200:
+                        raise OtodataConnectionError(
+                            f"Error communicating with API: {response.status}"
+                        )
+                    devices = await self._async_read_devices(response)
+        except asyncio.TimeoutError as err:
+            raise OtodataConnectionError("Timeout communicating with API") from err
+        except aiohttp.ClientError as err:
+            raise OtodataConnectionError(f"Error communicating with API: {err}") from err
+        except ValueError as err:
+            raise OtodataConnectionError(f"Invalid response from API: {err}") from err
+        finally:
+            self.last_request_duration = time.perf_counter() - start
+            _LOGGER.debug(
+                "GetAllDisplayPropaneDevices took %.3fs", self.last_request_duration
+            )
+
+        if not devices:
+            raise OtodataNoDevicesError("No devices found on account")
+        return devices
+
+    async def _async_read_devices(
+        self, response: aiohttp.ClientResponse
+    ) -> list[dict[str, Any]]:
+        """Stream the device list out of a response as it arrives."""
+        loop = asyncio.get_running_loop()
+        parser = DeviceStreamParser()
+        decode = 0.0
+        try:
+            async for chunk in response.content.iter_chunked(API_CHUNK_SIZE):
+                start = time.perf_counter()
+                # Small accounts parse inline; beyond that each chunk is
+                # handed to the executor
+                if parser.bytes_read + len(chunk) < API_EXECUTOR_DECODE_BYTES:
+                    parser.feed(chunk)
+                else:
+                    await loop.run_in_executor(None, parser.feed, chunk)
+                decode += time.perf_counter() - start
+            start = time.perf_counter()
+            devices = parser.close()
+            decode += time.perf_counter() - start
+            return devices
+        finally:
+            self.last_response_bytes = parser.bytes_read
+            self.last_decode_duration = decode
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> float | None:
+    """Return the Retry-After delay in seconds, if the API sent one."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -1,25 +1,35 @@
 """Config flow for Otodata Tank Monitor integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
-import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+
+from .account import async_cache_validated_devices, entry_credentials
+from .api import (
+    OtodataApiClient,
+    OtodataApiError,
+    OtodataAuthError,
+    OtodataNoDevicesError,
+    async_get_api_session,
+)
 from .const import (
     DOMAIN,
     CONF_USERNAME,
     CONF_PASSWORD,
     CONF_PRICING_URL,
-    API_URL,
-    API_TIMEOUT,
+    CONF_ACCOUNTS,
+    CONF_MAX_CONCURRENCY,
+    DEFAULT_MAX_CONCURRENCY,
+    API_MAX_IN_FLIGHT,
     STATE_PRICING_URLS,
 )
 
@@ -39,39 +49,82 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    session = async_get_clientsession(hass)
-    auth = aiohttp.BasicAuth(data[CONF_USERNAME], data[CONF_PASSWORD])
+    client = OtodataApiClient(
+        async_get_api_session(hass), data[CONF_USERNAME], data[CONF_PASSWORD]
+    )
 
     try:
-        async with session.get(
-            API_URL,
-            auth=auth,
-            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
-        ) as response:
-            if response.status == 401:
-                raise InvalidAuth
-            if response.status != 200:
-                raise CannotConnect
-            
-            json_data = await response.json()
-            if not json_data or len(json_data) == 0:
-                raise NoDevices
-
-    except aiohttp.ClientError as err:
+        devices = await client.async_get_devices()
+    except OtodataAuthError as err:
+        raise InvalidAuth from err
+    except OtodataNoDevicesError as err:
+        raise NoDevices from err
+    except OtodataApiError as err:
         _LOGGER.error("Error connecting to Neevo API: %s", err)
         raise CannotConnect from err
-    except Exception as err:
-        _LOGGER.exception("Unexpected error: %s", err)
-        raise CannotConnect from err
+
+    # Let the first coordinator refresh reuse this response
+    async_cache_validated_devices(hass, data, devices)
 
     return {"title": f"Otodata Tank Monitor"}
 
 
+def parse_accounts(
+    text: str, stored: list[dict[str, str]] | None = None
+) -> list[dict[str, str]]:
+    """Parse one account per line into credential sets.
+
+    A line is ``username:password``, or just ``username`` to keep the
+    password already stored for that account.
+    """
+    known = {creds[CONF_USERNAME].lower(): creds for creds in stored or ()}
+    accounts: list[dict[str, str]] = []
+    for line in text.splitlines():
+        if not (line := line.strip()):
+            continue
+        username, sep, password = line.partition(":")
+        username = username.strip()
+        if not sep and (creds := known.get(username.lower())) is not None:
+            accounts.append(dict(creds))
+            continue
+        if not username or not password:
+            raise InvalidAccounts
+        accounts.append({CONF_USERNAME: username, CONF_PASSWORD: password})
+    return accounts
+
+
+async def validate_accounts(
+    hass: HomeAssistant, accounts: list[dict[str, str]], max_concurrency: int
+) -> None:
+    """Validate additional fleet accounts concurrently."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def validate(data: dict[str, str]) -> None:
+        async with semaphore:
+            await validate_input(hass, data)
+
+    results = await asyncio.gather(
+        *(validate(data) for data in accounts), return_exceptions=True
+    )
+    # Report the first failure in line order
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Otodata Tank Monitor."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -104,6 +157,77 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle fleet options for Otodata Tank Monitor."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the additional fleet accounts."""
+        errors: dict[str, str] = {}
+        options = self.config_entry.options
+
+        if user_input is not None:
+            max_concurrency = user_input[CONF_MAX_CONCURRENCY]
+            try:
+                accounts = parse_accounts(
+                    user_input.get(CONF_ACCOUNTS, ""), options.get(CONF_ACCOUNTS)
+                )
+                # Only accounts that are not already part of the entry need a check
+                known = entry_credentials(self.config_entry.data, options)
+                await validate_accounts(
+                    self.hass,
+                    [creds for creds in accounts if creds not in known],
+                    max_concurrency,
+                )
+            except InvalidAccounts:
+                errors["base"] = "invalid_accounts"
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except NoDevices:
+                errors["base"] = "no_devices"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        CONF_ACCOUNTS: accounts,
+                        CONF_MAX_CONCURRENCY: max_concurrency,
+                    },
+                )
+
+        # Never echo stored passwords; a bare username keeps its password
+        accounts_text = "\n".join(
+            creds[CONF_USERNAME] for creds in options.get(CONF_ACCOUNTS, ())
+        )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    # Suggested, not a default, so a cleared field removes
+                    # every fleet account instead of restoring them
+                    vol.Optional(
+                        CONF_ACCOUNTS, description={"suggested_value": accounts_text}
+                    ): TextSelector(TextSelectorConfig(multiline=True)),
+                    vol.Required(
+                        CONF_MAX_CONCURRENCY,
+                        default=min(
+                            options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+                            API_MAX_IN_FLIGHT,
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=API_MAX_IN_FLIGHT)
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -114,3 +238,7 @@ class InvalidAuth(HomeAssistantError):
 
 class NoDevices(HomeAssistantError):
     """Error to indicate no devices found."""
+
+
+class InvalidAccounts(HomeAssistantError):
+    """Error to indicate the fleet account list could not be parsed."""
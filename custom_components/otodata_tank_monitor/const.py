@@ -1,4 +1,6 @@
 """Constants for the Otodata Tank Monitor integration."""
+from datetime import timedelta
+import os
 
 DOMAIN = "otodata_tank_monitor"
 
@@ -6,14 +8,93 @@ DOMAIN = "otodata_tank_monitor"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_PRICING_URL = "pricing_url"
+CONF_ACCOUNTS = "accounts"
+CONF_MAX_CONCURRENCY = "max_concurrency"
 
 # API
-API_URL = "https://ws.otodatanetwork.com/neevoapp/v1/DataService.svc/GetAllDisplayPropaneDevices"
+API_HOST = "ws.otodatanetwork.com"
+# Point the integration at a local stand-in (benchmarks/standin.py) for
+# offline and load testing; unset in normal use
+API_BASE_URL = os.environ.get("OTODATA_API_BASE_URL", f"https://{API_HOST}").rstrip("/")
+API_URL = f"{API_BASE_URL}/neevoapp/v1/DataService.svc/GetAllDisplayPropaneDevices"
 API_TIMEOUT = 30
+API_POOL_LIMIT = 20
+API_POOL_LIMIT_PER_HOST = 4
+API_KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+API_DNS_CACHE_TTL = 300
+API_EXECUTOR_DECODE_BYTES = 65536  # decode beyond this many bytes off the event loop
+API_CHUNK_SIZE = 16384
+ACCOUNT_CACHE_TTL = 60  # seconds a device list is shared between entries
+VALIDATION_CACHE_TTL = 120  # seconds the config flow's device list seeds setup
+API_RATE_LIMIT = 5  # request starts per second to one host
+API_MAX_IN_FLIGHT = 4  # requests waiting on one host at a time
+API_RETRY_ATTEMPTS = 3  # tries per refresh for transient errors
+API_RETRY_BASE_DELAY = 2  # seconds, doubled for every further try
+API_RETRY_MAX_DELAY = 30  # seconds; longer Retry-After values are not waited out
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+CIRCUIT_RESET_TIMEOUT = 300  # seconds before a trial request is let through
+
+# EIA pricing
+# Replaces the scheme and host of configured pricing URLs when set
+EIA_BASE_URL = os.environ.get("OTODATA_EIA_BASE_URL")
+PRICE_TIMEOUT = 30
+PRICE_RELEASE_WEEKDAY = 2  # EIA publishes weekly propane prices on Wednesday
+PRICE_RELEASE_HOUR_UTC = 19  # shortly after the early-afternoon Eastern release
+PRICE_RETRY_INTERVAL = timedelta(hours=6)
+PRICE_FETCH_CONCURRENCY = 4
+PRICE_RATE_LIMIT = 1  # request starts per second to eia.gov
+PRICE_RELEASE_JITTER = timedelta(minutes=30)  # spread over this long after a release
+PRICE_SAVE_DELAY = 10  # seconds
+PRICE_CHUNK_SIZE = 16384
+PRICE_MAX_BYTES = 1048576  # give up on pages that never show a price
+# EIA publishes from October to March, so this is about twenty seasons
+PRICE_HISTORY_WEEKS = 520
+PRICE_YEAR_AGO_TOLERANCE = 3  # days a stored week may be off the same week last year
+
+# Startup snapshot
+SNAPSHOT_MAX_AGE = timedelta(days=7)  # older snapshots wait for a live fetch
+SNAPSHOT_SAVE_DELAY = 30  # seconds
+
+# Failed refreshes keep serving the last snapshot (up to SNAPSHOT_MAX_AGE)
+# and retry on a backoff starting here, capped at MIN_POLL_INTERVAL
+FAILURE_RETRY_INTERVAL = timedelta(minutes=5)
+
+# Tanks are filled to 80% to leave room for expansion
+FILL_LIMIT_PERCENT = 80
+
+# hass.data keys
+DATA_ACCOUNTS = f"{DOMAIN}_accounts"
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_VALIDATED_DEVICES = f"{DOMAIN}_validated_devices"
+DATA_PRICE_CACHE = f"{DOMAIN}_price_cache"
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"
+DATA_CIRCUIT_BREAKERS = f"{DOMAIN}_circuit_breakers"
+DATA_COORDINATORS = f"{DOMAIN}_coordinators"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL = 1440  # 24 hours in minutes
 DEFAULT_NAME = "Otodata Tank"
+# Accounts fetched at once in fleet mode; requests to the Otodata host are
+# capped at API_MAX_IN_FLIGHT, so more would only queue
+DEFAULT_MAX_CONCURRENCY = API_MAX_IN_FLIGHT
+
+# Adaptive polling
+MIN_POLL_INTERVAL = timedelta(hours=1)
+MAX_POLL_INTERVAL = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
+UPLOAD_MARGIN = timedelta(minutes=15)  # poll this long after an expected upload
+MIN_UPLOAD_PERIOD = timedelta(minutes=10)  # ignore closer readings when learning
+CADENCE_SMOOTHING = 0.3  # weight of the newest upload interval
+STARTUP_JITTER = timedelta(minutes=5)  # spread revalidation after a restart
+REFRESH_JITTER = timedelta(minutes=10)  # spread polls aimed at the same upload
+
+# Consumption estimates
+CONSUMPTION_HALF_LIFE = timedelta(days=14)  # weight of a reading halves over this
+REFILL_THRESHOLD = 5  # level rise in percentage points treated as a delivery
+MIN_CONSUMPTION_SPAN = timedelta(days=2)  # readings needed before estimating
+MIN_CONSUMPTION_RATE = 0.01  # percent per day; slower counts as not in use
+
+# Refresh metrics
+METRICS_WINDOW = 50  # refreshes kept per stage for the rolling percentiles
 
 # Conversion factors
 KPA_TO_PSI = 0.145038  # 1 kPa = 0.145038 PSI
@@ -81,6 +162,8 @@ STATE_PRICING_URLS = {
 ATTR_LEVEL = "level"
 ATTR_LAST_READING = "last_reading_date"
 ATTR_TANK_CAPACITY = "tank_capacity"
+ATTR_TANK_CAPACITY_LITERS = "tank_capacity_liters"
+ATTR_TANK_CAPACITY_GALLONS = "tank_capacity_gallons"
 ATTR_PROPANE_PRICE = "propane_price"
 ATTR_SERIAL_NUMBER = "serial_number"
 ATTR_CUSTOM_NAME = "custom_name"
@@ -89,5 +172,28 @@ ATTR_NOTIFY_AT_1 = "notify_at_level_1"
 ATTR_NOTIFY_AT_2 = "notify_at_level_2"
 ATTR_TANK_PRESSURE = "tank_pressure"
 ATTR_PRESSURE_UNIT = "pressure_unit"
+ATTR_TANK_PRESSURE_PSI = "tank_pressure_psi"
+ATTR_PRESSURE_KPA = "pressure_kpa"
+ATTR_ORIGINAL_UNIT = "original_unit"
 ATTR_IS_OWNER = "is_owner"
 ATTR_PRODUCT = "product"
+ATTR_PRICE_WEEK = "price_week"
+ATTR_PRICE_HISTORY_WEEKS = "price_history_weeks"
+ATTR_PREVIOUS_PRICE = "previous_price"
+ATTR_PRICE_CHANGE = "price_change"
+ATTR_YEAR_AGO_PRICE = "year_ago_price"
+ATTR_GALLONS_TO_FILL = "gallons_to_fill"
+ATTR_STALE = "stale"
+ATTR_DATA_FETCHED_AT = "data_fetched_at"
+ATTR_LITERS_PER_DAY = "liters_per_day"
+ATTR_PERCENT_PER_DAY = "percent_per_day"
+ATTR_LAST_REFRESH_BYTES = "last_refresh_bytes"
+ATTR_FAILED_REFRESHES = "failed_refreshes"
+ATTR_LAST_ERROR = "last_error"
+ATTR_LITERS = "liters"
+ATTR_CAPACITY_LITERS = "capacity_liters"
+ATTR_FILL_PERCENT = "fill_percent"
+ATTR_TANKS_REPORTING = "tanks_reporting"
+ATTR_TANK_ID = "tank_id"
+ATTR_TANK_NAME = "tank_name"
+ATTR_TANKS = "tanks"
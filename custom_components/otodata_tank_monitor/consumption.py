@@ -0,0 +1,217 @@
+"""Incremental propane consumption estimates for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import logging
+
+from .const import (
+    GALLONS_TO_LITERS,
+    CONSUMPTION_HALF_LIFE,
+    REFILL_THRESHOLD,
+    MIN_CONSUMPTION_SPAN,
+    MIN_CONSUMPTION_RATE,
+)
+from .models import OtodataSnapshot, TankReading
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+# Move the regression's time origin forward once readings are this many
+# days past it, to keep the sums well conditioned
+RECENTER_DAYS = 365
+
+
+@dataclass(frozen=True, slots=True)
+class ConsumptionEstimate:
+    """Consumption of one tank as of its latest reading."""
+
+    percent_per_day: float
+    liters_per_day: float | None
+    gallons_per_day: float | None
+    days_to_notify_1: float | None
+    days_to_notify_2: float | None
+    days_to_empty: float | None
+
+
+class LevelTrend:
+    """Exponentially weighted linear regression of level over time.
+
+    Each reading updates five decayed sums in O(1); the slope is the
+    consumption rate. A rise of REFILL_THRESHOLD or more is a delivery and
+    starts a new segment, so refills never count as negative consumption.
+    """
+
+    __slots__ = ("origin", "segment_start", "last_ts", "last_level", "sw", "st", "sl", "stt", "stl")
+
+    def __init__(self, state: Iterable[float] | None = None) -> None:
+        """Initialize the trend, optionally from a saved state."""
+        if state is not None:
+            (
+                self.origin,
+                self.segment_start,
+                self.last_ts,
+                self.last_level,
+                self.sw,
+                self.st,
+                self.sl,
+                self.stt,
+                self.stl,
+            ) = state
+        else:
+            self.last_ts: float | None = None
+            self._reset(0.0)
+
+    def _reset(self, timestamp: float) -> None:
+        """Forget the sums and start a new segment at ``timestamp``."""
+        self.origin = timestamp
+        self.segment_start = timestamp
+        self.sw = self.st = self.sl = self.stt = self.stl = 0.0
+
+    def _recenter(self, shift: float) -> None:
+        """Move the time origin ``shift`` days forward."""
+        self.stt += shift * (shift * self.sw - 2 * self.st)
+        self.stl -= shift * self.sl
+        self.st -= shift * self.sw
+        self.origin += shift * SECONDS_PER_DAY
+
+    def as_list(self) -> list[float]:
+        """Return the state for storage."""
+        return [
+            self.origin,
+            self.segment_start,
+            self.last_ts,
+            self.last_level,
+            self.sw,
+            self.st,
+            self.sl,
+            self.stt,
+            self.stl,
+        ]
+
+    def observe(self, timestamp: float, level: float) -> bool:
+        """Add a reading; return False if it is not newer than the last one."""
+        if self.last_ts is not None and timestamp <= self.last_ts:
+            return False
+
+        if self.last_ts is None or level - self.last_level >= REFILL_THRESHOLD:
+            if self.last_ts is not None:
+                _LOGGER.debug("Level rose %.1f%%; treating as a refill", level - self.last_level)
+            self._reset(timestamp)
+        else:
+            decay = 0.5 ** (
+                (timestamp - self.last_ts) / CONSUMPTION_HALF_LIFE.total_seconds()
+            )
+            self.sw *= decay
+            self.st *= decay
+            self.sl *= decay
+            self.stt *= decay
+            self.stl *= decay
+
+        t = (timestamp - self.origin) / SECONDS_PER_DAY
+        if t > RECENTER_DAYS:
+            self._recenter(t)
+            t = 0.0
+        self.sw += 1
+        self.st += t
+        self.sl += level
+        self.stt += t * t
+        self.stl += t * level
+        self.last_ts = timestamp
+        self.last_level = level
+        return True
+
+    def rate(self) -> float | None:
+        """Return the consumption in percent per day, or None if not yet known."""
+        if self.last_ts is None:
+            return None
+        if self.last_ts - self.segment_start < MIN_CONSUMPTION_SPAN.total_seconds():
+            return None
+        variance = self.sw * self.stt - self.st * self.st
+        if variance <= 1e-9:
+            return None
+        slope = (self.sw * self.stl - self.st * self.sl) / variance
+        return max(-slope, 0.0)
+
+
+def _days_to(level: float, threshold: float | None, rate: float) -> float | None:
+    """Return the days until ``level`` falls to ``threshold`` at ``rate``."""
+    if threshold is None:
+        return None
+    if level <= threshold:
+        return 0.0
+    if rate < MIN_CONSUMPTION_RATE:
+        return None
+    return round((level - threshold) / rate, 1)
+
+
+def estimate_consumption(tank: TankReading, trend: LevelTrend) -> ConsumptionEstimate | None:
+    """Derive a tank's consumption estimate from its trend."""
+    if (rate := trend.rate()) is None or tank.level is None:
+        return None
+
+    liters_per_day = None
+    gallons_per_day = None
+    if tank.capacity_liters is not None:
+        liters = rate / 100 * tank.capacity_liters
+        liters_per_day = round(liters, 2)
+        gallons_per_day = round(liters / GALLONS_TO_LITERS, 2)
+
+    return ConsumptionEstimate(
+        percent_per_day=round(rate, 3),
+        liters_per_day=liters_per_day,
+        gallons_per_day=gallons_per_day,
+        days_to_notify_1=_days_to(tank.level, tank.notify_at_1, rate),
+        days_to_notify_2=_days_to(tank.level, tank.notify_at_2, rate),
+        days_to_empty=_days_to(tank.level, 0, rate),
+    )
+
+
+class ConsumptionTracker:
+    """Consumption estimates for every tank, updated once per new reading."""
+
+    __slots__ = ("_trends", "_estimates")
+
+    def __init__(self, states: dict[str, list[float]] | None = None) -> None:
+        """Initialize the tracker, optionally with previously saved trends."""
+        self._trends: dict[str, LevelTrend] = {}
+        for tank_id, state in (states or {}).items():
+            try:
+                self._trends[tank_id] = LevelTrend(state)
+            except (TypeError, ValueError):
+                _LOGGER.debug("Discarding unreadable consumption state for %s", tank_id)
+        self._estimates: dict[str, ConsumptionEstimate | None] = {}
+
+    @property
+    def states(self) -> dict[str, list[float]]:
+        """Return every trend's state for storage."""
+        return {tank_id: trend.as_list() for tank_id, trend in self._trends.items()}
+
+    def estimate(self, tank_id: str) -> ConsumptionEstimate | None:
+        """Return a tank's latest estimate."""
+        return self._estimates.get(tank_id)
+
+    def observe(
+        self, snapshot: OtodataSnapshot, changed: Iterable[str] | None = None
+    ) -> None:
+        """Feed new readings of the changed tanks (all tanks if None)."""
+        tanks = snapshot.tanks
+        for tank_id in tanks if changed is None else changed:
+            if (tank := tanks.get(tank_id)) is None:
+                continue
+            trend = self._trends.get(tank_id)
+            if tank.last_reading is not None and tank.level is not None:
+                if trend is None:
+                    trend = self._trends[tank_id] = LevelTrend()
+                trend.observe(tank.last_reading.timestamp(), tank.level)
+            # Thresholds and capacity may change without a new reading
+            self._estimates[tank_id] = (
+                None if trend is None else estimate_consumption(tank, trend)
+            )
+
+        # Trends (and so the stored states) and estimates only cover the
+        # tanks in this snapshot
+        for tank_id in self._trends.keys() - tanks.keys():
+            del self._trends[tank_id]
+        for tank_id in self._estimates.keys() - tanks.keys():
+            del self._estimates[tank_id]
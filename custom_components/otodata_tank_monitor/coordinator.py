@@ -0,0 +1,451 @@
+"""Data update coordinators for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .account import OtodataAccount, async_get_account, entry_credentials
+from .api import OtodataApiError
+from .const import (
+    DOMAIN,
+    CONF_PRICING_URL,
+    CONF_MAX_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    API_MAX_IN_FLIGHT,
+    PRICE_RETRY_INTERVAL,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_SAVE_DELAY,
+    FAILURE_RETRY_INTERVAL,
+    MIN_POLL_INTERVAL,
+    STARTUP_JITTER,
+    PRICE_RELEASE_JITTER,
+)
+from .models import (
+    OtodataSnapshot,
+    TankReading,
+    build_snapshot,
+    build_snapshot_update,
+    project_device,
+)
+from .consumption import ConsumptionTracker
+from .history import TankHistoryStore
+from .metrics import (
+    STAGE_ENTITY_FANOUT,
+    STAGE_PRICE_PARSE,
+    STAGE_PRICE_REQUEST,
+    STAGE_SNAPSHOT,
+    STAGE_TANK_DECODE,
+    STAGE_TANK_REQUEST,
+    RefreshMetrics,
+)
+from .pricing import PriceCache, PriceData, PriceFetchError, next_price_release
+from .scheduler import UploadCadenceScheduler, async_refresh_phase
+from .statistics import TankStatisticsImporter
+
+_LOGGER = logging.getLogger(__name__)
+
+# Starting interval until the upload cadence has been learned
+SCAN_INTERVAL = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
+
+SNAPSHOT_STORAGE_VERSION = 1
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's last good device list."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+
+class OtodataUpdateCoordinator(DataUpdateCoordinator[OtodataSnapshot]):
+    """Class to manage fetching Otodata tank data.
+
+    An entry normally has one Nee-Vo account; in fleet mode it has many,
+    which are fetched concurrently (bounded by max_concurrency) and merged
+    into one Id-keyed snapshot.
+
+    When a refresh fails the last good snapshot keeps being served, marked
+    stale, while retries continue on a backoff; entities only go unavailable
+    once it is older than SNAPSHOT_MAX_AGE.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize."""
+        self.entry = entry
+        self.accounts = [
+            async_get_account(hass, creds)
+            for creds in entry_credentials(entry.data, entry.options)
+        ]
+        # Options saved before the range was capped may hold larger values
+        self.max_concurrency: int = min(
+            entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            API_MAX_IN_FLIGHT,
+        )
+        # Last good device list per account, so one failing account in a
+        # fleet does not drop every other account's tanks
+        self._account_devices: dict[str, list[dict[str, Any]]] = {}
+        # Accounts whose latest reply was an empty list while tanks were known
+        self._empty_accounts: set[str] = set()
+        self._store = snapshot_store(hass, entry.entry_id)
+        self.history = TankHistoryStore(hass, entry.entry_id)
+        self.statistics = TankStatisticsImporter(hass, self.history)
+        # This entry's slot among all entries, to keep polls from bunching up
+        self.phase = async_refresh_phase(hass, entry.entry_id)
+        self.scheduler = UploadCadenceScheduler(phase=self.phase)
+        self.consumption = ConsumptionTracker()
+        # Tanks changed by the latest update; None means every tank
+        self.changed_tanks: frozenset[str] | None = None
+        # Tank Ids that appeared in or left the account with the latest update
+        self.added_tanks: frozenset[str] = frozenset()
+        self.removed_tanks: frozenset[str] = frozenset()
+        # Set while the last good snapshot is served after failed refreshes
+        self.stale_since: datetime | None = None
+        self._failures = 0
+        # Seconds the latest refresh spent on the event loop, by stage
+        self.loop_time: dict[str, float] = {}
+        # Rolling stage timings and counters, shared with the price coordinator
+        self.metrics = RefreshMetrics()
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=SCAN_INTERVAL,
+        )
+
+        entry.async_on_unload(self._async_close_history)
+
+        # Entries sharing an account receive each other's fetches
+        for account in self.accounts:
+            entry.async_on_unload(
+                account.async_add_listener(
+                    self, partial(self._handle_account_devices, account.key)
+                )
+            )
+
+    async def _async_close_history(self) -> None:
+        """Release the history memory maps when the entry unloads."""
+        await self.hass.async_add_executor_job(self.history.close)
+
+    async def async_restore(self) -> bool:
+        """Load the last good snapshot from disk; return True if one was usable."""
+        if not (stored := await self._store.async_load()):
+            return False
+        fetched_at = dt_util.parse_datetime(stored.get("fetched_at") or "")
+        if fetched_at is None or dt_util.utcnow() - fetched_at > SNAPSHOT_MAX_AGE:
+            return False
+
+        keys = {account.key for account in self.accounts}
+        stored_accounts = stored.get("accounts")
+        if stored_accounts is None and "devices" in stored:
+            # Saved before fleet mode, when the entry had a single account
+            stored_accounts = {self.accounts[0].key: stored["devices"]}
+        # Snapshots saved before ingest projection still hold every raw field
+        self._account_devices = {
+            key: [project_device(device) for device in devices if isinstance(device, dict)]
+            for key, devices in (stored_accounts or {}).items()
+            if key in keys
+        }
+        if not self._account_devices:
+            # Saved for other credentials; the first refresh must block
+            _LOGGER.debug("Stored snapshot has none of this entry's accounts")
+            return False
+        self.data = await self.hass.async_add_executor_job(
+            build_snapshot, self._merged_devices(), fetched_at
+        )
+        self.scheduler = UploadCadenceScheduler(stored.get("cadence"), self.phase)
+        self.scheduler.observe(self.data)
+        self.consumption = ConsumptionTracker(stored.get("consumption"))
+        self.consumption.observe(self.data)
+        _LOGGER.debug("Restored %s tanks fetched at %s", len(self.data.tanks), fetched_at)
+        return True
+
+    async def async_jittered_refresh(self) -> None:
+        """Refresh after this entry's share of STARTUP_JITTER."""
+        await asyncio.sleep(STARTUP_JITTER.total_seconds() * self.phase)
+        await self.async_refresh()
+
+    def _merged_devices(self) -> list[dict[str, Any]]:
+        """Return the device lists of all accounts, in account order."""
+        return [
+            device
+            for account in self.accounts
+            for device in self._account_devices.get(account.key, ())
+        ]
+
+    @callback
+    def _async_save_snapshot(self, fetched_at: datetime) -> None:
+        """Persist the latest device lists for the next startup."""
+        account_devices = dict(self._account_devices)
+        self._store.async_delay_save(
+            lambda: {
+                "accounts": account_devices,
+                "fetched_at": fetched_at.isoformat(),
+                "cadence": self.scheduler.periods,
+                "consumption": self.consumption.states,
+            },
+            SNAPSHOT_SAVE_DELAY,
+        )
+
+    async def _async_build_snapshot(self) -> OtodataSnapshot:
+        """Build and diff the merged snapshot in the executor, then apply it."""
+        build_start = time.perf_counter()
+        fetched_at = dt_util.utcnow()
+        # After a failed update every entity must write to become available
+        previous = self.data if self.last_update_success else None
+        device_lists = [
+            self._account_devices.get(account.key, []) for account in self.accounts
+        ]
+        snapshot, changed = await self.hass.async_add_executor_job(
+            build_snapshot_update, previous, device_lists, fetched_at
+        )
+
+        start = time.perf_counter()
+        self.changed_tanks = changed
+        known = self.data.tanks.keys() if self.data else frozenset()
+        self.added_tanks = frozenset(snapshot.tanks.keys() - known)
+        self.removed_tanks = frozenset(known - snapshot.tanks.keys())
+        self.scheduler.observe(snapshot)
+        self.consumption.observe(snapshot, changed)
+        self.update_interval = self.scheduler.next_interval(dt_util.utcnow())
+        self._async_save_snapshot(fetched_at)
+        self._async_record_history(snapshot, changed)
+        end = time.perf_counter()
+        self.loop_time["process"] = end - start
+        self.metrics.record(STAGE_SNAPSHOT, end - build_start)
+        return snapshot
+
+    @callback
+    def _async_record_history(
+        self, snapshot: OtodataSnapshot, changed: frozenset[str] | None
+    ) -> None:
+        """Append the readings of changed tanks to their history files."""
+        if changed is None:
+            tanks = list(snapshot.tanks.values())
+        else:
+            tanks = [snapshot.tanks[t] for t in changed if t in snapshot.tanks]
+        if tanks:
+            self.entry.async_create_background_task(
+                self.hass, self._async_store_readings(tanks), "otodata_tank_history"
+            )
+
+    async def _async_store_readings(self, tanks: list[TankReading]) -> None:
+        """Append readings to the history, then import them as statistics."""
+        await self.history.async_append(tanks)
+        await self.statistics.async_import(tanks)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, timing the entity writes."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.loop_time["listeners"] = time.perf_counter() - start
+        self.metrics.record(STAGE_ENTITY_FANOUT, self.loop_time["listeners"])
+        _LOGGER.debug(
+            "Refresh held the event loop for %.1f ms (process %.1f ms, listeners %.1f ms)",
+            sum(self.loop_time.values()) * 1000,
+            self.loop_time.get("process", 0) * 1000,
+            self.loop_time["listeners"] * 1000,
+        )
+
+    @callback
+    def _handle_account_devices(self, key: str, tanks_data: list[dict[str, Any]]) -> None:
+        """Handle a device list fetched on behalf of another entry."""
+        self._async_set_account_devices(key, tanks_data)
+        self.entry.async_create_background_task(
+            self.hass,
+            self._async_apply_account_devices(),
+            "otodata_tank_shared_update",
+        )
+
+    async def _async_apply_account_devices(self) -> None:
+        """Publish a snapshot rebuilt from another entry's fetch."""
+        self.async_set_updated_data(await self._async_build_snapshot())
+
+    @callback
+    def _async_set_account_devices(self, key: str, devices: list[dict[str, Any]]) -> None:
+        """Store an account's device list, riding out a single empty reply.
+
+        An empty list is more likely an API hiccup than every tank leaving,
+        so an account keeps its previous tanks until it comes back empty on
+        two consecutive refreshes.
+        """
+        if not devices and self._account_devices.get(key):
+            if key not in self._empty_accounts:
+                self._empty_accounts.add(key)
+                _LOGGER.debug("Keeping previous tanks after an empty device list")
+                return
+        self._empty_accounts.discard(key)
+        self._account_devices[key] = devices
+
+    async def _async_fetch_accounts(self) -> None:
+        """Fetch every account concurrently, bounded by max_concurrency."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(account: OtodataAccount) -> list[dict[str, Any]]:
+            async with semaphore:
+                return await account.async_get_devices(self)
+
+        results = await asyncio.gather(
+            *(fetch(account) for account in self.accounts), return_exceptions=True
+        )
+
+        errors: list[OtodataApiError] = []
+        for account, result in zip(self.accounts, results):
+            if isinstance(result, OtodataApiError):
+                errors.append(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self._async_set_account_devices(account.key, result)
+
+        if len(errors) == len(self.accounts):
+            raise UpdateFailed(str(errors[0])) from errors[0]
+        if errors:
+            _LOGGER.warning(
+                "%s of %s Nee-Vo accounts failed to update; keeping their last "
+                "readings: %s",
+                len(errors),
+                len(self.accounts),
+                errors[0],
+            )
+
+    @callback
+    def _async_serve_stale(self, err: UpdateFailed) -> OtodataSnapshot:
+        """Keep the last good snapshot after a failed refresh, if recent enough."""
+        self._failures += 1
+        self.update_interval = min(
+            FAILURE_RETRY_INTERVAL * 2 ** min(self._failures - 1, 8), MIN_POLL_INTERVAL
+        )
+
+        now = dt_util.utcnow()
+        if (
+            self.data is None
+            or self.data.fetched_at is None
+            or now - self.data.fetched_at > SNAPSHOT_MAX_AGE
+        ):
+            raise err
+
+        if self.stale_since is None:
+            _LOGGER.warning(
+                "Keeping tank data from %s while the Otodata API fails: %s",
+                self.data.fetched_at,
+                err,
+            )
+            self.stale_since = now
+            # Every entity writes once to show it is stale
+            self.changed_tanks = None
+        else:
+            _LOGGER.debug("Otodata refresh %s failed: %s", self._failures, err)
+            self.changed_tanks = frozenset()
+        self.added_tanks = self.removed_tanks = frozenset()
+        return self.data
+
+    @callback
+    def _async_record_fetches(self, since: float) -> None:
+        """Add the requests made for this refresh to the metrics."""
+        self.metrics.record_fetch(
+            [
+                account.last_fetch
+                for account in self.accounts
+                # Cached and validated device lists cost no request
+                if account.last_fetch is not None and account.last_fetch.finished >= since
+            ],
+            STAGE_TANK_REQUEST,
+            STAGE_TANK_DECODE,
+        )
+
+    async def _async_update_data(self) -> OtodataSnapshot:
+        """Update data via library."""
+        self.loop_time = {}
+        start = time.perf_counter()
+        since = time.monotonic()
+        try:
+            await self._async_fetch_accounts()
+        except UpdateFailed as err:
+            self._async_record_fetches(since)
+            self.metrics.record_refresh(time.perf_counter() - start, err)
+            return self._async_serve_stale(err)
+        self._async_record_fetches(since)
+
+        # Derive everything the sensors need once per refresh
+        snapshot = await self._async_build_snapshot()
+        self.metrics.record_refresh(time.perf_counter() - start)
+        self._failures = 0
+        if self.stale_since is not None:
+            # Every entity writes once to drop its stale mark
+            self.stale_since = None
+            self.changed_tanks = None
+        return snapshot
+
+
+class OtodataPriceCoordinator(DataUpdateCoordinator[PriceData]):
+    """Class to manage the EIA propane price for one config entry.
+
+    EIA publishes residential propane prices once a week, so this runs on its
+    own schedule, aligned just after the weekly release, independent of the
+    tank refresh. Prices come from the shared PriceCache.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        cache: PriceCache,
+        metrics: RefreshMetrics | None = None,
+    ) -> None:
+        """Initialize."""
+        self.entry = entry
+        self.cache = cache
+        self.metrics = metrics or RefreshMetrics()
+        self.pricing_url: str = entry.data[CONF_PRICING_URL]
+        self.phase = async_refresh_phase(hass, entry.entry_id)
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_price",
+            update_interval=PRICE_RETRY_INTERVAL,
+        )
+
+        entry.async_on_unload(cache.async_register(self.pricing_url))
+
+    async def _async_update_data(self) -> PriceData:
+        """Return the current propane price and its recent history."""
+        since = time.monotonic()
+        try:
+            propane_price = await self.cache.async_get_price(self.pricing_url)
+        except PriceFetchError as err:
+            # Retry sooner if this attempt fails
+            self.update_interval = PRICE_RETRY_INTERVAL
+            raise UpdateFailed(str(err)) from err
+        finally:
+            # Only weekly releases fetch; other refreshes are served from cache
+            stats = self.cache.fetch_stats.get(self.pricing_url)
+            if stats is not None and stats.finished >= since:
+                self.metrics.record_fetch([stats], STAGE_PRICE_REQUEST, STAGE_PRICE_PARSE)
+
+        if self.cache.is_fresh(self.pricing_url):
+            # Entries check the new release at staggered times; the first
+            # one refreshes the shared cache for the rest
+            now = dt_util.utcnow()
+            self.update_interval = (
+                next_price_release(now) + PRICE_RELEASE_JITTER * self.phase - now
+            )
+        else:
+            self.update_interval = PRICE_RETRY_INTERVAL
+        return PriceData.from_history(
+            propane_price, self.cache.get_history(self.pricing_url)
+        )
@@ -0,0 +1,79 @@
+"""Diagnostics support for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    API_HOST,
+    ATTR_SERIAL_NUMBER,
+    ATTR_CUSTOM_NAME,
+    DATA_COORDINATORS,
+    DATA_CIRCUIT_BREAKERS,
+)
+from .coordinator import OtodataUpdateCoordinator
+
+# Fleet accounts in the options are redacted by the same keys
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, ATTR_SERIAL_NUMBER, ATTR_CUSTOM_NAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+    }
+    coordinator: OtodataUpdateCoordinator | None = hass.data.get(
+        DATA_COORDINATORS, {}
+    ).get(entry.entry_id)
+    if coordinator is None:
+        return diagnostics
+
+    data = coordinator.data
+    breaker = hass.data.get(DATA_CIRCUIT_BREAKERS, {}).get(API_HOST)
+    diagnostics["coordinator"] = {
+        "last_update_success": coordinator.last_update_success,
+        "update_interval": (
+            coordinator.update_interval.total_seconds()
+            if coordinator.update_interval
+            else None
+        ),
+        "fetched_at": data.fetched_at.isoformat() if data and data.fetched_at else None,
+        "stale_since": (
+            coordinator.stale_since.isoformat() if coordinator.stale_since else None
+        ),
+        "circuit_open": breaker.is_open if breaker is not None else False,
+        "accounts": len(coordinator.accounts),
+        "max_concurrency": coordinator.max_concurrency,
+        "phase": coordinator.phase,
+        "loop_time_ms": {
+            stage: round(seconds * 1000, 1)
+            for stage, seconds in coordinator.loop_time.items()
+        },
+    }
+    diagnostics["metrics"] = coordinator.metrics.as_dict()
+    if data is not None:
+        fleet = data.fleet
+        diagnostics["fleet"] = {
+            "reporting": fleet.reporting,
+            "gallons": fleet.gallons,
+            "fill_percent": fleet.fill_percent,
+            "average_level": fleet.average_level,
+            "lowest_tank_id": fleet.lowest_tank_id,
+            "below_notify_1": list(fleet.below_notify_1),
+            "breakdown": fleet.breakdown(),
+        }
+    diagnostics["tanks"] = [
+        async_redact_data(dict(tank.attributes), TO_REDACT)
+        for tank in (data.tanks.values() if data else ())
+    ]
+    return diagnostics
@@ -0,0 +1,243 @@
+"""Compact per-tank reading history for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN
+from .models import TankReading
+
+_LOGGER = logging.getLogger(__name__)
+
+# File layout: an 8-byte header followed by fixed-width little-endian records
+# of (epoch seconds, level percent, pressure PSI). Missing values are NaN.
+HISTORY_MAGIC = b"OTOH"
+HISTORY_VERSION = 1
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<qff")
+TIMESTAMP = struct.Struct("<q")
+
+NAN = float("nan")
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryRange:
+    """Readings of one tank within a time range, as parallel columns."""
+
+    timestamps: array  # epoch seconds, array("q")
+    levels: array  # percent, array("f")
+    pressures: array  # PSI, array("f")
+
+    def __len__(self) -> int:
+        """Return the number of readings."""
+        return len(self.timestamps)
+
+
+def _empty_range() -> HistoryRange:
+    """Return a range without readings."""
+    return HistoryRange(array("q"), array("f"), array("f"))
+
+
+class TankHistoryFile:
+    """Append-only, timestamp-ordered history of one tank.
+
+    Reads go through a memory map and binary search on the timestamp
+    column, so a range query touches only the pages it returns. All methods
+    block and must run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the file."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: mmap.mmap | None = None
+        self._last_timestamp: int | None = None
+
+    def _count(self, size: int) -> int:
+        """Return the number of whole records in a file of ``size`` bytes."""
+        return max(size - HEADER.size, 0) // RECORD.size
+
+    def _open_map(self) -> mmap.mmap | None:
+        """Return the memory map of the file, or None if it has no records."""
+        if self._map is not None:
+            return self._map
+        try:
+            with open(self.path, "rb") as file:
+                if self._count(os.fstat(file.fileno()).st_size) == 0:
+                    return None
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        magic, version, record_size = HEADER.unpack_from(self._map)
+        if magic != HISTORY_MAGIC or version != HISTORY_VERSION or record_size != RECORD.size:
+            _LOGGER.warning("Ignoring unreadable tank history %s", self.path)
+            self._map.close()
+            self._map = None
+        return self._map
+
+    def _timestamp_at(self, data: mmap.mmap, index: int) -> int:
+        """Return the timestamp of record ``index``."""
+        return TIMESTAMP.unpack_from(data, HEADER.size + index * RECORD.size)[0]
+
+    def _bisect(self, data: mmap.mmap, count: int, timestamp: int) -> int:
+        """Return the index of the first record at or after ``timestamp``."""
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            if self._timestamp_at(data, mid) < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _newest(self) -> int | None:
+        """Return the newest timestamp; the caller holds the lock."""
+        if self._last_timestamp is None and (data := self._open_map()) is not None:
+            self._last_timestamp = self._timestamp_at(data, self._count(len(data)) - 1)
+        return self._last_timestamp
+
+    def append(self, records: Iterable[tuple[int, float, float]]) -> int:
+        """Append records newer than the last one; return how many were written."""
+        with self._lock:
+            last = self._newest()
+            new: list[bytes] = []
+            for timestamp, level, pressure in records:
+                # LastReadingDate only moves forward; anything else is a repeat
+                if last is not None and timestamp <= last:
+                    continue
+                new.append(RECORD.pack(timestamp, level, pressure))
+                last = timestamp
+            if not new:
+                return 0
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as file:
+                size = file.tell()
+                if size < HEADER.size:
+                    file.truncate(0)
+                    file.write(HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, RECORD.size))
+                elif torn := (size - HEADER.size) % RECORD.size:
+                    # Drop a record cut short by a crash mid-write
+                    file.truncate(size - torn)
+                file.write(b"".join(new))
+
+            # The map covers the old length; remap on the next read
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._last_timestamp = last
+            return len(new)
+
+    def read(self, start: int | None = None, end: int | None = None) -> HistoryRange:
+        """Return the records with ``start <= timestamp < end``."""
+        with self._lock:
+            if (data := self._open_map()) is None:
+                return _empty_range()
+            count = self._count(len(data))
+            first = 0 if start is None else self._bisect(data, count, start)
+            stop = count if end is None else self._bisect(data, count, end)
+            if first >= stop:
+                return _empty_range()
+
+            timestamps = array("q")
+            levels = array("f")
+            pressures = array("f")
+            view = memoryview(data)[
+                HEADER.size + first * RECORD.size : HEADER.size + stop * RECORD.size
+            ]
+            try:
+                for timestamp, level, pressure in RECORD.iter_unpack(view):
+                    timestamps.append(timestamp)
+                    levels.append(level)
+                    pressures.append(pressure)
+            finally:
+                view.release()
+            return HistoryRange(timestamps, levels, pressures)
+
+    def close(self) -> None:
+        """Release the memory map."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+def history_dir(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the directory holding an entry's tank history files."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.history", entry_id)
+
+
+class TankHistoryStore:
+    """The history files of every tank in one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self.path = history_dir(hass, entry_id)
+        self._files: dict[str, TankHistoryFile] = {}
+
+    def _file(self, tank_id: str) -> TankHistoryFile:
+        """Return the history file of a tank."""
+        if (history := self._files.get(tank_id)) is None:
+            # Tank Ids are numeric, but never let one escape the directory
+            name = "".join(c if c.isalnum() or c in "-_" else "_" for c in tank_id)
+            history = self._files[tank_id] = TankHistoryFile(
+                os.path.join(self.path, f"{name}.bin")
+            )
+        return history
+
+    def _append(self, readings: dict[str, tuple[int, float, float]]) -> int:
+        """Append one reading per tank; return how many were new."""
+        return sum(
+            self._file(tank_id).append((record,)) for tank_id, record in readings.items()
+        )
+
+    async def async_append(self, tanks: Iterable[TankReading]) -> None:
+        """Record the latest reading of each tank, skipping ones already stored."""
+        readings = {
+            tank.tank_id: (
+                int(tank.last_reading.timestamp()),
+                NAN if tank.level is None else tank.level,
+                NAN if tank.pressure_psi is None else tank.pressure_psi,
+            )
+            for tank in tanks
+            if tank.last_reading is not None
+        }
+        if not readings:
+            return
+        if added := await self.hass.async_add_executor_job(self._append, readings):
+            _LOGGER.debug("Appended %s readings to tank history", added)
+
+    def read(
+        self, tank_id: str, start: int | None = None, end: int | None = None
+    ) -> HistoryRange:
+        """Return a tank's readings with ``start <= timestamp < end`` (epoch seconds)."""
+        return self._file(tank_id).read(start, end)
+
+    async def async_read(
+        self, tank_id: str, start: int | None = None, end: int | None = None
+    ) -> HistoryRange:
+        """Return a tank's readings with ``start <= timestamp < end`` (epoch seconds)."""
+        return await self.hass.async_add_executor_job(self.read, tank_id, start, end)
+
+    def close(self) -> None:
+        """Release every memory map."""
+        for history in list(self._files.values()):
+            history.close()
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete an entry's tank history files."""
+    await hass.async_add_executor_job(
+        shutil.rmtree, history_dir(hass, entry_id), True
+    )
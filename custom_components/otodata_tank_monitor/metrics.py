@@ -0,0 +1,136 @@
+"""Refresh-cycle timing metrics for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+import math
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import METRICS_WINDOW
+
+# Stages of a refresh, in the order they run
+STAGE_TANK_REQUEST = "tank_request"
+STAGE_TANK_DECODE = "tank_decode"
+STAGE_SNAPSHOT = "snapshot"
+STAGE_ENTITY_FANOUT = "entity_fanout"
+STAGE_PRICE_REQUEST = "price_request"
+STAGE_PRICE_PARSE = "price_parse"
+STAGE_REFRESH = "refresh"
+STAGES = (
+    STAGE_TANK_REQUEST,
+    STAGE_TANK_DECODE,
+    STAGE_SNAPSHOT,
+    STAGE_ENTITY_FANOUT,
+    STAGE_PRICE_REQUEST,
+    STAGE_PRICE_PARSE,
+    STAGE_REFRESH,
+)
+
+
+@dataclass(slots=True)
+class FetchStats:
+    """Cost of one upstream fetch, summed over its retries."""
+
+    request: float = 0.0  # seconds waiting on the network
+    decode: float = 0.0  # seconds parsing the body
+    bytes: int = 0
+    retries: int = 0
+    finished: float = 0.0  # time.monotonic() when the fetch ended
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of sorted samples."""
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+class RefreshMetrics:
+    """Rolling stage timings and transfer counters for one config entry.
+
+    Each stage keeps its last METRICS_WINDOW samples. Counters run from
+    Home Assistant's start; none of this is persisted.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        """Initialize the metrics."""
+        self._samples: dict[str, deque[float]] = {
+            stage: deque(maxlen=window) for stage in STAGES
+        }
+        self.refreshes = 0
+        self.failures = 0
+        self.retries = 0
+        self.bytes_total = 0
+        self.last_bytes = 0
+        self.last_failure: datetime | None = None
+        self.last_error: str | None = None
+
+    @callback
+    def record(self, stage: str, seconds: float) -> None:
+        """Add one sample for a stage."""
+        self._samples[stage].append(seconds)
+
+    @callback
+    def record_fetch(
+        self,
+        fetches: list[FetchStats],
+        request_stage: str,
+        decode_stage: str,
+    ) -> None:
+        """Add the fetches of one refresh.
+
+        Concurrent requests overlap, so the slowest one is the request
+        time; decoding competes for the same loop and executor, so it adds up.
+        """
+        if not fetches:
+            return
+        self.record(request_stage, max(fetch.request for fetch in fetches))
+        self.record(decode_stage, sum(fetch.decode for fetch in fetches))
+        self.last_bytes = sum(fetch.bytes for fetch in fetches)
+        self.bytes_total += self.last_bytes
+        self.retries += sum(fetch.retries for fetch in fetches)
+
+    @callback
+    def record_refresh(self, seconds: float, error: Exception | None = None) -> None:
+        """Count a finished tank refresh."""
+        self.record(STAGE_REFRESH, seconds)
+        self.refreshes += 1
+        if error is not None:
+            self.failures += 1
+            self.last_failure = dt_util.utcnow()
+            self.last_error = str(error)
+
+    def last(self, stage: str) -> float | None:
+        """Return the latest sample of a stage in seconds."""
+        samples = self._samples[stage]
+        return samples[-1] if samples else None
+
+    def percentiles(self, stage: str) -> dict[str, float] | None:
+        """Return the p50, p95 and maximum of a stage in milliseconds."""
+        if not (samples := self._samples[stage]):
+            return None
+        ordered = sorted(samples)
+        return {
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every metric, for diagnostics."""
+        return {
+            "stages": {
+                stage: {"samples": len(self._samples[stage]), **stats}
+                for stage in STAGES
+                if (stats := self.percentiles(stage)) is not None
+            },
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "bytes_total": self.bytes_total,
+            "last_bytes": self.last_bytes,
+            "last_failure": self.last_failure.isoformat() if self.last_failure else None,
+            "last_error": self.last_error,
+        }
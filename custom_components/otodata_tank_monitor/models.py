@@ -0,0 +1,357 @@
+"""Data models for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import logging
+import math
+from operator import mul
+import re
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+from .const import (
+    KPA_TO_PSI,
+    GALLONS_TO_LITERS,
+    FILL_LIMIT_PERCENT,
+    ATTR_LEVEL,
+    ATTR_LAST_READING,
+    ATTR_TANK_CAPACITY,
+    ATTR_TANK_CAPACITY_LITERS,
+    ATTR_TANK_CAPACITY_GALLONS,
+    ATTR_SERIAL_NUMBER,
+    ATTR_CUSTOM_NAME,
+    ATTR_COMPANY_NAME,
+    ATTR_NOTIFY_AT_1,
+    ATTR_NOTIFY_AT_2,
+    ATTR_TANK_PRESSURE,
+    ATTR_PRESSURE_UNIT,
+    ATTR_TANK_PRESSURE_PSI,
+    ATTR_PRESSURE_KPA,
+    ATTR_ORIGINAL_UNIT,
+    ATTR_IS_OWNER,
+    ATTR_PRODUCT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Otodata's date format: /Date(1768421163920-0500)/
+NEEVO_DATE_PATTERN = re.compile(r"/Date\((-?\d+)([+-]\d{4})?\)/")
+
+EMPTY_MAPPING: Mapping[str, Any] = MappingProxyType({})
+
+NAN = float("nan")
+
+# Device fields read by build_tank_reading; everything else is dropped on ingest
+DEVICE_FIELDS = frozenset(
+    {
+        "Id",
+        "Level",
+        "TankCapacity",
+        "LastReadingDate",
+        "TankLastPressure",
+        "TankPressureDisplayUnitSymbol",
+        "SerialNumber",
+        "CustomName",
+        "CompanyName",
+        "Product",
+        "IsOwner",
+        "NotifyAt1",
+        "NotifyAt2",
+    }
+)
+
+
+def parse_neevo_date(date_str: str | None) -> datetime | None:
+    """Parse Otodata's date format into a timezone-aware datetime.
+
+    The number is milliseconds since the epoch (UTC); the optional suffix is the
+    display offset of the monitor, which is kept as the tzinfo.
+    """
+    if not date_str:
+        return None
+
+    try:
+        match = NEEVO_DATE_PATTERN.search(date_str)
+        if match:
+            tz = timezone.utc
+            if offset := match.group(2):
+                minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+                if offset[0] == "-":
+                    minutes = -minutes
+                tz = timezone(timedelta(minutes=minutes))
+            # Convert milliseconds to seconds
+            return datetime.fromtimestamp(int(match.group(1)) / 1000, tz)
+    except (ValueError, OverflowError, TypeError) as err:
+        _LOGGER.debug("Could not parse date %s: %s", date_str, err)
+
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class TankReading:
+    """Immutable, precomputed view of one tank from a single refresh."""
+
+    tank_id: str
+    # Only used for fallback names; a reordered response is not a change
+    position: int = field(compare=False)
+    custom_name: str | None
+    level: float | None
+    capacity_liters: float | None
+    capacity_gallons: float | None
+    liters_remaining: float | None
+    gallons_remaining: float | None
+    gallons_to_fill: float | None
+    pressure: float | None
+    pressure_unit: str | None
+    pressure_psi: float | None
+    last_reading: datetime | None
+    notify_at_1: float | None
+    notify_at_2: float | None
+    attributes: Mapping[str, Any]
+    pressure_attributes: Mapping[str, Any]
+
+    @property
+    def name(self) -> str:
+        """Return the display name used as a prefix for this tank's sensors."""
+        return self.custom_name or f"Tank {self.position}"
+
+    @property
+    def has_pressure(self) -> bool:
+        """Return True if the monitor reports tank pressure."""
+        return self.pressure is not None
+
+
+@dataclass(frozen=True, slots=True)
+class FleetSummary:
+    """Aggregates over every tank in a snapshot.
+
+    Built from parallel array columns (NaN where a tank does not report a
+    value), which also serve the per-tank breakdown.
+    """
+
+    tank_ids: tuple[str, ...] = ()
+    levels: array = field(default_factory=lambda: array("d"))  # percent
+    capacities: array = field(default_factory=lambda: array("d"))  # liters
+    notify_at_1: array = field(default_factory=lambda: array("d"))  # percent
+    reporting: int = 0
+    liters: float | None = None
+    gallons: float | None = None
+    capacity_liters: float | None = None
+    fill_percent: float | None = None
+    average_level: float | None = None
+    lowest_tank_id: str | None = None
+    lowest_level: float | None = None
+    below_notify_1: tuple[str, ...] = ()
+
+    def breakdown(self) -> list[dict[str, Any]]:
+        """Return each tank's values from the columns."""
+
+        def value(column: array, index: int) -> float | None:
+            return None if math.isnan(column[index]) else column[index]
+
+        return [
+            {
+                "tank_id": tank_id,
+                "level": value(self.levels, index),
+                "capacity_liters": value(self.capacities, index),
+                "notify_at_1": value(self.notify_at_1, index),
+            }
+            for index, tank_id in enumerate(self.tank_ids)
+        ]
+
+
+def _column(values: Iterable[float | None]) -> array:
+    """Return a float column with NaN for missing values."""
+    return array("d", (NAN if v is None else v for v in values))
+
+
+def summarize_fleet(tanks: Iterable[TankReading]) -> FleetSummary:
+    """Compute the fleet aggregates over columns of every tank's values."""
+    tanks = list(tanks)
+    levels = _column(tank.level for tank in tanks)
+    capacities = _column(tank.capacity_liters for tank in tanks)
+    notify_at_1 = _column(tank.notify_at_1 for tank in tanks)
+    # NaN never compares true, so tanks missing a value drop out of each test
+    reported = [level for level in levels if level == level]
+    if not reported:
+        return FleetSummary(tuple(t.tank_id for t in tanks), levels, capacities, notify_at_1)
+
+    contents = [v for v in map(mul, levels, capacities) if v == v]
+    capacity = math.fsum(c for c, level in zip(capacities, levels) if c == c and level == level)
+    liters = math.fsum(contents) / 100 if contents else None
+    lowest = min((level, i) for i, level in enumerate(levels) if level == level)[1]
+    return FleetSummary(
+        tank_ids=tuple(tank.tank_id for tank in tanks),
+        levels=levels,
+        capacities=capacities,
+        notify_at_1=notify_at_1,
+        reporting=len(reported),
+        liters=None if liters is None else round(liters, 1),
+        gallons=None if liters is None else round(liters / GALLONS_TO_LITERS, 1),
+        capacity_liters=round(capacity, 1) if capacity else None,
+        fill_percent=round(liters / capacity * 100, 1) if liters is not None and capacity else None,
+        average_level=round(math.fsum(reported) / len(reported), 1),
+        lowest_tank_id=tanks[lowest].tank_id,
+        lowest_level=levels[lowest],
+        below_notify_1=tuple(
+            tanks[i].tank_id
+            for i, (level, notify) in enumerate(zip(levels, notify_at_1))
+            if level <= notify
+        ),
+    )
+
+
+EMPTY_FLEET = FleetSummary()
+
+
+@dataclass(frozen=True, slots=True)
+class OtodataSnapshot:
+    """Immutable result of one coordinator refresh, keyed by tank Id."""
+
+    tanks: Mapping[str, TankReading] = field(default_factory=lambda: EMPTY_MAPPING)
+    # When the device list was fetched from the API
+    fetched_at: datetime | None = None
+    fleet: FleetSummary = EMPTY_FLEET
+
+
+def project_device(device: dict[str, Any]) -> dict[str, Any]:
+    """Return only the fields of a raw API device that the integration uses."""
+    return {key: value for key, value in device.items() if key in DEVICE_FIELDS}
+
+
+def build_tank_reading(tank_data: dict[str, Any], position: int) -> TankReading | None:
+    """Build a TankReading with all derived values from a raw API device."""
+    raw_id = tank_data.get("Id")
+    if raw_id is None:
+        _LOGGER.debug("Skipping tank %s without an Id", position)
+        return None
+
+    level = tank_data.get("Level")
+    # API returns capacity in liters
+    capacity_liters = tank_data.get("TankCapacity")
+    last_reading = parse_neevo_date(tank_data.get("LastReadingDate"))
+
+    capacity_gallons = None
+    liters_remaining = None
+    gallons_remaining = None
+    gallons_to_fill = None
+    if capacity_liters is not None:
+        capacity_gallons = round(capacity_liters / GALLONS_TO_LITERS, 1)
+        if level is not None:
+            liters = (level / 100) * capacity_liters
+            liters_remaining = round(liters, 1)
+            gallons_remaining = round(liters / GALLONS_TO_LITERS, 1)
+            # Tanks are only filled to FILL_LIMIT_PERCENT
+            fill_percent = max(FILL_LIMIT_PERCENT - level, 0)
+            gallons_to_fill = round(
+                (fill_percent / 100) * capacity_liters / GALLONS_TO_LITERS, 1
+            )
+
+    pressure = tank_data.get("TankLastPressure")
+    pressure_unit = None
+    pressure_psi = None
+    pressure_attrs: dict[str, Any] = {}
+    if pressure is not None:
+        pressure_unit = tank_data.get("TankPressureDisplayUnitSymbol", "kPa")
+        if pressure_unit == "kPa":
+            pressure_psi = round(pressure * KPA_TO_PSI, 2)
+            pressure_attrs[ATTR_PRESSURE_KPA] = pressure
+            pressure_attrs[ATTR_ORIGINAL_UNIT] = pressure_unit
+        else:
+            pressure_psi = pressure
+
+    attrs: dict[str, Any] = {
+        ATTR_LEVEL: level,
+        ATTR_TANK_CAPACITY: capacity_liters,  # Original from API (liters)
+        ATTR_TANK_CAPACITY_LITERS: capacity_liters,  # Explicit liters
+        ATTR_SERIAL_NUMBER: tank_data.get("SerialNumber"),
+        ATTR_CUSTOM_NAME: tank_data.get("CustomName"),
+        ATTR_COMPANY_NAME: tank_data.get("CompanyName"),
+        ATTR_PRODUCT: tank_data.get("Product"),
+        ATTR_IS_OWNER: tank_data.get("IsOwner"),
+        ATTR_NOTIFY_AT_1: tank_data.get("NotifyAt1"),
+        ATTR_NOTIFY_AT_2: tank_data.get("NotifyAt2"),
+    }
+    if capacity_gallons is not None:
+        attrs[ATTR_TANK_CAPACITY_GALLONS] = capacity_gallons
+    if last_reading:
+        attrs[ATTR_LAST_READING] = last_reading.isoformat()
+    if pressure is not None:
+        attrs[ATTR_TANK_PRESSURE] = pressure
+        attrs[ATTR_PRESSURE_UNIT] = pressure_unit
+        if pressure_unit == "kPa":
+            attrs[ATTR_TANK_PRESSURE_PSI] = pressure_psi
+
+    return TankReading(
+        tank_id=str(raw_id),
+        position=position,
+        custom_name=tank_data.get("CustomName") or None,
+        level=level,
+        capacity_liters=capacity_liters,
+        capacity_gallons=capacity_gallons,
+        liters_remaining=liters_remaining,
+        gallons_remaining=gallons_remaining,
+        gallons_to_fill=gallons_to_fill,
+        pressure=pressure,
+        pressure_unit=pressure_unit,
+        pressure_psi=pressure_psi,
+        last_reading=last_reading,
+        notify_at_1=tank_data.get("NotifyAt1"),
+        notify_at_2=tank_data.get("NotifyAt2"),
+        attributes=MappingProxyType(attrs),
+        pressure_attributes=MappingProxyType(pressure_attrs) if pressure_attrs else EMPTY_MAPPING,
+    )
+
+
+def build_snapshot(
+    tanks_data: list[dict[str, Any]] | None, fetched_at: datetime | None = None
+) -> OtodataSnapshot:
+    """Build an Id-keyed snapshot from the GetAllDisplayPropaneDevices payload."""
+    tanks: dict[str, TankReading] = {}
+    for position, tank_data in enumerate(tanks_data or (), start=1):
+        if not isinstance(tank_data, dict):
+            continue
+        reading = build_tank_reading(tank_data, position)
+        if reading is not None:
+            tanks[reading.tank_id] = reading
+
+    return OtodataSnapshot(
+        tanks=MappingProxyType(tanks),
+        fetched_at=fetched_at,
+        fleet=summarize_fleet(tanks.values()),
+    )
+
+
+def changed_tank_ids(
+    previous: OtodataSnapshot | None, current: OtodataSnapshot
+) -> frozenset[str] | None:
+    """Return the Ids of tanks whose reading differs, or None if all may have."""
+    if previous is None:
+        return None
+
+    changed = set(previous.tanks.keys() ^ current.tanks.keys())
+    for tank_id, tank in current.tanks.items():
+        if (old := previous.tanks.get(tank_id)) is None:
+            continue
+        # A new upload always changes LastReadingDate; fall back to a full
+        # comparison to catch edits such as renames or new thresholds
+        if old.last_reading != tank.last_reading or old != tank:
+            changed.add(tank_id)
+    return frozenset(changed)
+
+
+def build_snapshot_update(
+    previous: OtodataSnapshot | None,
+    device_lists: Iterable[list[dict[str, Any]]],
+    fetched_at: datetime | None,
+) -> tuple[OtodataSnapshot, frozenset[str] | None]:
+    """Merge per-account device lists into a snapshot and diff it.
+
+    Pure and CPU-bound on large accounts, so it runs in the executor; the
+    inputs are never mutated after the handoff.
+    """
+    tanks_data = [device for devices in device_lists for device in devices]
+    snapshot = build_snapshot(tanks_data, fetched_at)
+    return snapshot, changed_tank_ids(previous, snapshot)
@@ -0,0 +1,460 @@
+"""Shared EIA propane price cache for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from array import array
+import asyncio
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import logging
+import re
+import time
+from types import MappingProxyType
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+import async_timeout
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import async_get_api_session, async_get_rate_limiter
+from .const import (
+    DOMAIN,
+    EIA_BASE_URL,
+    PRICE_TIMEOUT,
+    PRICE_RELEASE_WEEKDAY,
+    PRICE_RELEASE_HOUR_UTC,
+    PRICE_FETCH_CONCURRENCY,
+    PRICE_RATE_LIMIT,
+    PRICE_SAVE_DELAY,
+    PRICE_CHUNK_SIZE,
+    PRICE_MAX_BYTES,
+    PRICE_HISTORY_WEEKS,
+    PRICE_YEAR_AGO_TOLERANCE,
+    ATTR_PRICE_WEEK,
+    ATTR_PRICE_HISTORY_WEEKS,
+    ATTR_PREVIOUS_PRICE,
+    ATTR_PRICE_CHANGE,
+    ATTR_YEAR_AGO_PRICE,
+    DATA_PRICE_CACHE,
+    STATE_PRICING_URLS,
+)
+from .metrics import FetchStats
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.prices"
+
+PRICE_HEADERS = {"Accept": "text/html"}
+
+# Week dates are in the header; prices are the first DataRow's cells, with
+# the current week in the Current2 cell
+ROW_START = b"DataRow"
+# Rows opened and closed inside the data row (a nested table) are skipped
+ROW_TAG_PATTERN = re.compile(rb"<(/?)tr[\s>]", re.IGNORECASE)
+ROW_TAG_MAX_LEN = 5
+DATE_PATTERN = re.compile(rb">\s*(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\s*<")
+# Values may be wrapped in inline tags such as <span> or <b>
+CELL_PATTERN = re.compile(
+    rb'<td[^>]*class="?((?:Data|Current)\w*)[^>]*>(?:\s*<[^/][^>]*>)*\s*\$?([\d.]+)\s*<'
+)
+CURRENT_PATTERN = re.compile(rb"Current2.*?>\s*\$?(\d+(?:\.\d+)?)\s*<", re.DOTALL)
+
+
+class PriceFetchError(HomeAssistantError):
+    """Error to indicate a propane price could not be fetched."""
+
+
+def request_url(url: str) -> str:
+    """Return where to fetch a pricing URL, honouring an EIA_BASE_URL override."""
+    if not EIA_BASE_URL:
+        return url
+    base = urlsplit(EIA_BASE_URL)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, ""))
+
+
+def next_price_release(now: datetime) -> datetime:
+    """Return the first EIA weekly release time strictly after now (UTC)."""
+    release = now.replace(
+        hour=PRICE_RELEASE_HOUR_UTC, minute=0, second=0, microsecond=0
+    ) + timedelta(days=(PRICE_RELEASE_WEEKDAY - now.weekday()) % 7)
+    if release <= now:
+        release += timedelta(days=7)
+    return release
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedPricePage:
+    """Result of parsing one EIA weekly price page."""
+
+    price: float | None
+    # (week as date ordinal, price) pairs, oldest first
+    series: tuple[tuple[int, float], ...] = ()
+
+
+class PriceStreamParser:
+    """Incremental parser for an EIA weekly price page.
+
+    Buffers the page header (which holds the week dates) and the first
+    ``DataRow``, and reports completion as soon as that row's own ``</tr>``
+    has been seen so the rest of the page is never read. Each chunk is only
+    scanned once for the marker it is waiting on.
+    """
+
+    __slots__ = ("_head", "_row", "_scan_from", "_depth", "bytes_read")
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._head = bytearray()
+        self._row: bytearray | None = None
+        self._scan_from = 0
+        # Open <tr> elements, counting the data row itself
+        self._depth = 1
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a chunk; return True once the first data row is complete."""
+        self.bytes_read += len(chunk)
+
+        if self._row is None:
+            self._head += chunk
+            if (index := self._head.find(ROW_START, self._scan_from)) == -1:
+                # Rescan enough to match a marker split across chunks
+                self._scan_from = max(0, len(self._head) - len(ROW_START) + 1)
+                return False
+            self._row = self._head[index:]
+            del self._head[index:]
+            self._scan_from = 0
+        else:
+            self._row += chunk
+
+        end = None
+        for match in ROW_TAG_PATTERN.finditer(self._row, self._scan_from):
+            self._depth += -1 if match.group(1) else 1
+            if self._depth == 0:
+                end = match.start()
+                break
+            self._scan_from = match.end()
+        if end is None:
+            # Rescan enough to match a tag split across chunks
+            self._scan_from = max(self._scan_from, len(self._row) - ROW_TAG_MAX_LEN + 1)
+            return False
+        del self._row[end:]
+        return True
+
+    def close(self) -> ParsedPricePage:
+        """Parse what was buffered into the current price and weekly series."""
+        if self._row is None:
+            return ParsedPricePage(None)
+
+        weeks: list[int] = []
+        for month, day, year in DATE_PATTERN.findall(self._head):
+            year = int(year)
+            try:
+                weeks.append(date(year + 2000 if year < 100 else year, int(month), int(day)).toordinal())
+            except ValueError:
+                continue
+
+        price = None
+        values: list[float] = []
+        for css_class, value in CELL_PATTERN.findall(self._row):
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+            values.append(number)
+            if css_class == b"Current2":
+                price = number
+
+        if price is None and (match := CURRENT_PATTERN.search(self._row)):
+            try:
+                price = float(match.group(1))
+            except ValueError:
+                pass
+
+        # Week columns and values line up from the most recent (rightmost) one
+        count = min(len(weeks), len(values))
+        series = tuple(zip(weeks[len(weeks) - count:], values[len(values) - count:]))
+        return ParsedPricePage(price, series)
+
+
+class PriceHistory:
+    """Array-backed weekly price series for one EIA region."""
+
+    __slots__ = ("weeks", "prices")
+
+    def __init__(self, weeks: Iterable[int] = (), prices: Iterable[float] = ()) -> None:
+        """Initialize the series."""
+        self.weeks = array("l", weeks)
+        self.prices = array("d", prices)
+
+    def __len__(self) -> int:
+        """Return the number of weeks stored."""
+        return len(self.weeks)
+
+    def merge(self, series: Iterable[tuple[int, float]]) -> int:
+        """Append weeks newer than the last stored one; return how many."""
+        last = self.weeks[-1] if self.weeks else None
+        added = 0
+        for week, price in sorted(series):
+            if last is not None and week <= last:
+                continue
+            self.weeks.append(week)
+            self.prices.append(price)
+            last = week
+            added += 1
+
+        if (excess := len(self.weeks) - PRICE_HISTORY_WEEKS) > 0:
+            del self.weeks[:excess]
+            del self.prices[:excess]
+        return added
+
+    def price_entries_ago(self, entries: int) -> float | None:
+        """Return the price stored ``entries`` entries before the latest one."""
+        if entries >= len(self.prices):
+            return None
+        return self.prices[-1 - entries]
+
+    def price_near(self, week: int, tolerance: int) -> float | None:
+        """Return the price of the stored week closest to an ordinal date.
+
+        None unless a week lies within ``tolerance`` days; the series has a
+        gap every spring and summer, when EIA publishes no prices.
+        """
+        index = bisect_left(self.weeks, week)
+        nearest = min(
+            (i for i in (index - 1, index) if 0 <= i < len(self.weeks)),
+            key=lambda i: abs(self.weeks[i] - week),
+            default=None,
+        )
+        if nearest is None or abs(self.weeks[nearest] - week) > tolerance:
+            return None
+        return self.prices[nearest]
+
+
+@dataclass(frozen=True, slots=True)
+class PriceData:
+    """Immutable price view published by the pricing coordinator."""
+
+    price: float
+    week: date | None
+    previous_price: float | None
+    year_ago_price: float | None
+    attributes: Mapping[str, Any]
+
+    @classmethod
+    def from_history(cls, price: float, history: PriceHistory | None) -> PriceData:
+        """Build the published view from the current price and series."""
+        week = previous = year_ago = None
+        attrs: dict[str, Any] = {}
+        if history:
+            week = date.fromordinal(history.weeks[-1])
+            previous = history.price_entries_ago(1)
+            # 52 weeks back by date; a season holds only about 26 entries
+            year_ago = history.price_near(
+                history.weeks[-1] - 364, PRICE_YEAR_AGO_TOLERANCE
+            )
+            attrs[ATTR_PRICE_WEEK] = week.isoformat()
+            attrs[ATTR_PRICE_HISTORY_WEEKS] = len(history)
+        if previous is not None:
+            attrs[ATTR_PREVIOUS_PRICE] = previous
+            attrs[ATTR_PRICE_CHANGE] = round(price - previous, 3)
+        if year_ago is not None:
+            attrs[ATTR_YEAR_AGO_PRICE] = year_ago
+        return cls(price, week, previous, year_ago, MappingProxyType(attrs))
+
+
+async def async_get_price_cache(hass: HomeAssistant) -> PriceCache:
+    """Return the process-wide price cache, loading it from disk once."""
+    if (cache := hass.data.get(DATA_PRICE_CACHE)) is None:
+        cache = hass.data[DATA_PRICE_CACHE] = PriceCache(hass)
+    await cache.async_load()
+    return cache
+
+
+class PriceCache:
+    """Propane prices for every configured EIA region, shared by all entries.
+
+    A price stays valid until the next weekly EIA release. When any entry
+    needs a stale price, every stale registered region is refreshed together
+    with bounded concurrency over the integration's pooled session, and the
+    results are persisted so a restart does not re-scrape eia.gov.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._prices: dict[str, tuple[float, datetime]] = {}
+        self._history: dict[str, PriceHistory] = {}
+        self._urls: Counter[str] = Counter()
+        # Cost of the latest fetch of each URL, for refresh metrics
+        self.fetch_stats: dict[str, FetchStats] = {}
+        self._load_task: asyncio.Task[None] | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+        # Regions the in-flight refresh is fetching
+        self._refresh_urls: frozenset[str] = frozenset()
+
+    async def async_load(self) -> None:
+        """Load persisted prices once."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        """Read persisted prices from storage."""
+        if not (stored := await self._store.async_load()):
+            return
+        for url, item in stored.get("prices", {}).items():
+            if (fetched_at := dt_util.parse_datetime(item.get("fetched_at", ""))) is None:
+                continue
+            self._prices[url] = (float(item["price"]), fetched_at)
+        for url, item in stored.get("history", {}).items():
+            self._history[url] = PriceHistory(item["weeks"], item["prices"])
+
+    @callback
+    def async_register(self, url: str) -> Callable[[], None]:
+        """Include a URL in bulk refreshes; return a callback that removes it."""
+        if url not in STATE_PRICING_URLS.values():
+            _LOGGER.debug("Pricing URL %s is not a known EIA region", url)
+        self._urls[url] += 1
+
+        @callback
+        def unregister() -> None:
+            self._urls[url] -= 1
+            if self._urls[url] <= 0:
+                del self._urls[url]
+
+        return unregister
+
+    @callback
+    def is_fresh(self, url: str) -> bool:
+        """Return True if the cached price is from the latest EIA release."""
+        if (cached := self._prices.get(url)) is None:
+            return False
+        return dt_util.utcnow() < next_price_release(cached[1])
+
+    @callback
+    def get_history(self, url: str) -> PriceHistory | None:
+        """Return the weekly price series collected for a URL."""
+        return self._history.get(url)
+
+    async def async_get_price(self, url: str) -> float:
+        """Return the price for a URL, refreshing stale regions if needed."""
+        if not self.is_fresh(url):
+            await self.async_refresh()
+
+        if (cached := self._prices.get(url)) is None:
+            raise PriceFetchError(f"No propane price available from {url}")
+        return cached[0]
+
+    async def async_refresh(self, urls: Iterable[str] | None = None) -> None:
+        """Refresh every stale registered region, sharing one in-flight run."""
+        requested = list(urls or self._urls)
+        while True:
+            if self._refresh_task is None:
+                stale = [u for u in requested if not self.is_fresh(u)]
+                self._refresh_task = self.hass.async_create_task(self._async_refresh(stale))
+                self._refresh_task.add_done_callback(self._clear_refresh)
+                self._refresh_urls = frozenset(stale)
+            attempted = self._refresh_urls
+            await asyncio.shield(self._refresh_task)
+            # A run already in flight may have been started before these
+            # regions were registered; fetch them in a run of their own
+            requested = [
+                u for u in requested if u not in attempted and not self.is_fresh(u)
+            ]
+            if not requested:
+                return
+
+    @callback
+    def _clear_refresh(self, task: asyncio.Task) -> None:
+        """Forget a finished refresh."""
+        if self._refresh_task is task:
+            self._refresh_task = None
+
+    async def _async_refresh(self, urls: list[str]) -> None:
+        """Fetch the given regions with bounded concurrency."""
+        if not urls:
+            return
+        session = async_get_api_session(self.hass)
+        semaphore = asyncio.Semaphore(PRICE_FETCH_CONCURRENCY)
+
+        async def fetch(url: str) -> None:
+            async with semaphore:
+                try:
+                    page = await self._async_fetch(session, url)
+                except PriceFetchError as err:
+                    _LOGGER.warning("Could not fetch propane price: %s", err)
+                    return
+            if page.price is not None:
+                self._prices[url] = (page.price, dt_util.utcnow())
+            if page.series:
+                added = self._history.setdefault(url, PriceHistory()).merge(page.series)
+                _LOGGER.debug("Added %s weeks of price history for %s", added, url)
+
+        await asyncio.gather(*(fetch(url) for url in urls))
+        self._store.async_delay_save(self._data_to_save, PRICE_SAVE_DELAY)
+
+    async def _async_fetch(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> ParsedPricePage:
+        """Fetch and parse one EIA page."""
+        fetch_url = request_url(url)
+        limiter = async_get_rate_limiter(
+            self.hass, urlsplit(fetch_url).hostname or fetch_url, PRICE_RATE_LIMIT
+        )
+        stats = self.fetch_stats[url] = FetchStats()
+        parser = PriceStreamParser()
+        start: float | None = None
+        try:
+            async with limiter, async_timeout.timeout(PRICE_TIMEOUT):
+                start = time.perf_counter()
+                async with session.get(fetch_url, headers=PRICE_HEADERS) as response:
+                    if response.status != 200:
+                        raise PriceFetchError(f"{url} returned {response.status}")
+                    async for chunk in response.content.iter_chunked(PRICE_CHUNK_SIZE):
+                        parse_start = time.perf_counter()
+                        done = await self.hass.async_add_executor_job(parser.feed, chunk)
+                        stats.decode += time.perf_counter() - parse_start
+                        # Stop reading once the first data row is complete
+                        if done:
+                            break
+                        if parser.bytes_read >= PRICE_MAX_BYTES:
+                            _LOGGER.debug("No price in first %s bytes of %s", parser.bytes_read, url)
+                            break
+        except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+            raise PriceFetchError(f"{url}: {err}") from err
+        finally:
+            if start is not None:
+                stats.request = time.perf_counter() - start - stats.decode
+            stats.bytes = parser.bytes_read
+            stats.finished = time.monotonic()
+
+        _LOGGER.debug("Read %s bytes from %s", parser.bytes_read, url)
+        parse_start = time.perf_counter()
+        page = await self.hass.async_add_executor_job(parser.close)
+        stats.decode += time.perf_counter() - parse_start
+        return page
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the prices to persist."""
+        return {
+            "prices": {
+                url: {"price": price, "fetched_at": fetched_at.isoformat()}
+                for url, (price, fetched_at) in self._prices.items()
+            },
+            "history": {
+                url: {"weeks": history.weeks.tolist(), "prices": history.prices.tolist()}
+                for url, history in self._history.items()
+            },
+        }
@@ -0,0 +1,127 @@
+"""Adaptive refresh scheduling for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import hashlib
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    CADENCE_SMOOTHING,
+    MIN_UPLOAD_PERIOD,
+    UPLOAD_MARGIN,
+    MIN_POLL_INTERVAL,
+    MAX_POLL_INTERVAL,
+    REFRESH_JITTER,
+)
+from .models import OtodataSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _phase_key(entry_id: str) -> bytes:
+    """Return a stable, well-mixed sort key for an entry."""
+    return hashlib.sha256(entry_id.encode()).digest()
+
+
+@callback
+def async_refresh_phase(hass: HomeAssistant, entry_id: str) -> float:
+    """Return the entry's slot in [0, 1) among all of the domain's entries.
+
+    Entries are spread evenly in a hash order, so the same set of entries
+    always gets the same slots and restarts do not line their polls up.
+    """
+    entry_ids = sorted(
+        (entry.entry_id for entry in hass.config_entries.async_entries(DOMAIN)),
+        key=_phase_key,
+    )
+    if entry_id not in entry_ids:
+        return int.from_bytes(_phase_key(entry_id)[:8], "big") / 2**64
+    return entry_ids.index(entry_id) / len(entry_ids)
+
+
+class UploadCadenceScheduler:
+    """Predict when monitors will next upload and poll just after that.
+
+    Each tank's upload period is learned from successive distinct
+    ``LastReadingDate`` values with an exponentially weighted average. The
+    next poll is placed just after the earliest expected upload; when a poll
+    finds nothing new the delay backs off exponentially up to the maximum.
+
+    ``phase`` (from async_refresh_phase) offsets each poll within
+    REFRESH_JITTER, and places polls within the maximum interval while
+    nothing is learned, so entries never poll in lockstep.
+    """
+
+    __slots__ = ("_last_reading", "_period", "_misses", "_phase")
+
+    def __init__(
+        self, periods: dict[str, float] | None = None, phase: float = 0.0
+    ) -> None:
+        """Initialize the scheduler, optionally with previously learned periods."""
+        self._last_reading: dict[str, datetime] = {}
+        # Learned upload period per tank, in seconds
+        self._period: dict[str, float] = dict(periods or {})
+        self._misses = 0
+        self._phase = phase
+
+    @property
+    def periods(self) -> dict[str, float]:
+        """Return the learned upload period per tank, in seconds."""
+        return dict(self._period)
+
+    def observe(self, snapshot: OtodataSnapshot) -> bool:
+        """Learn from a snapshot; return True if any tank has a new reading."""
+        new_data = False
+        for tank_id, tank in snapshot.tanks.items():
+            if (reading := tank.last_reading) is None:
+                continue
+            previous = self._last_reading.get(tank_id)
+            self._last_reading[tank_id] = reading
+            if previous is None or reading <= previous:
+                continue
+
+            new_data = True
+            delta = (reading - previous).total_seconds()
+            if delta < MIN_UPLOAD_PERIOD.total_seconds():
+                continue
+            if (period := self._period.get(tank_id)) is None:
+                self._period[tank_id] = delta
+            else:
+                self._period[tank_id] = period + CADENCE_SMOOTHING * (delta - period)
+
+        # Forget tanks that left the account
+        for tank_id in self._last_reading.keys() - snapshot.tanks.keys():
+            del self._last_reading[tank_id]
+            self._period.pop(tank_id, None)
+
+        self._misses = 0 if new_data else self._misses + 1
+        return new_data
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """Return how long to wait before the next poll."""
+        expected = [
+            self._last_reading[tank_id] + timedelta(seconds=period)
+            for tank_id, period in self._period.items()
+            if tank_id in self._last_reading
+        ]
+        upcoming = [when for when in expected if when > now]
+
+        jitter = REFRESH_JITTER * self._phase
+        if upcoming:
+            interval = min(upcoming) + UPLOAD_MARGIN + jitter - now
+        elif expected:
+            # Uploads are overdue; check again, backing off while nothing arrives
+            interval = MIN_POLL_INTERVAL * (2 ** min(self._misses, 8)) + jitter
+        else:
+            # Nothing learned yet; poll at this entry's slot of the day
+            period = MAX_POLL_INTERVAL.total_seconds()
+            interval = timedelta(
+                seconds=(self._phase * period - now.timestamp()) % period
+            )
+
+        interval = max(MIN_POLL_INTERVAL, min(interval, MAX_POLL_INTERVAL))
+        _LOGGER.debug("Next Otodata poll in %s (misses: %s)", interval, self._misses)
+        return interval
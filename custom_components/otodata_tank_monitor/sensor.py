@@ -1,13 +1,10 @@
 """Support for Otodata Tank Monitor sensors."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from collections.abc import Iterable
+from datetime import datetime
 import logging
-import re
-from typing import Any
-
-import aiohttp
-import async_timeout
+from typing import Any, Mapping
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -15,63 +12,60 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfPressure, UnitOfVolume
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfPressure,
+    UnitOfTime,
+    UnitOfVolume,
 )
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
-    DOMAIN,
-    CONF_USERNAME,
-    CONF_PASSWORD,
     CONF_PRICING_URL,
-    API_URL,
-    API_TIMEOUT,
-    DEFAULT_SCAN_INTERVAL,
-    KPA_TO_PSI,
-    GALLONS_TO_LITERS,
-    ATTR_LEVEL,
-    ATTR_LAST_READING,
-    ATTR_TANK_CAPACITY,
     ATTR_PROPANE_PRICE,
+    ATTR_GALLONS_TO_FILL,
+    ATTR_TANK_CAPACITY,
+    ATTR_TANK_CAPACITY_LITERS,
+    ATTR_TANK_CAPACITY_GALLONS,
     ATTR_SERIAL_NUMBER,
     ATTR_CUSTOM_NAME,
     ATTR_COMPANY_NAME,
+    ATTR_PRODUCT,
+    ATTR_IS_OWNER,
     ATTR_NOTIFY_AT_1,
     ATTR_NOTIFY_AT_2,
-    ATTR_TANK_PRESSURE,
     ATTR_PRESSURE_UNIT,
-    ATTR_IS_OWNER,
-    ATTR_PRODUCT,
+    ATTR_ORIGINAL_UNIT,
+    ATTR_PRICE_HISTORY_WEEKS,
+    ATTR_STALE,
+    ATTR_DATA_FETCHED_AT,
+    ATTR_LITERS_PER_DAY,
+    ATTR_PERCENT_PER_DAY,
+    ATTR_LAST_REFRESH_BYTES,
+    ATTR_FAILED_REFRESHES,
+    ATTR_LAST_ERROR,
+    ATTR_LITERS,
+    ATTR_CAPACITY_LITERS,
+    ATTR_FILL_PERCENT,
+    ATTR_TANKS_REPORTING,
+    ATTR_TANK_ID,
+    ATTR_TANK_NAME,
+    ATTR_TANKS,
+    DATA_COORDINATORS,
 )
+from .consumption import ConsumptionEstimate
+from .coordinator import OtodataPriceCoordinator, OtodataUpdateCoordinator
+from .metrics import STAGES, STAGE_REFRESH, RefreshMetrics
+from .models import FleetSummary, TankReading
+from .pricing import async_get_price_cache
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=DEFAULT_SCAN_INTERVAL)
-
-
-def parse_neevo_date(date_str: str | None) -> datetime | None:
-    """Parse Otodata's date format: /Date(1768421163920-0500)/"""
-    if not date_str:
-        return None
-    
-    try:
-        # Extract timestamp from /Date(1768421163920-0500)/ format
-        match = re.search(r'/Date\((\d+)([+-]\d{4})?\)/', date_str)
-        if match:
-            timestamp_ms = int(match.group(1))
-            # Convert milliseconds to seconds
-            return datetime.fromtimestamp(timestamp_ms / 1000)
-    except (ValueError, AttributeError) as err:
-        _LOGGER.debug("Could not parse date %s: %s", date_str, err)
-    
-    return None
-
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -80,313 +74,311 @@ async def async_setup_entry(
 ) -> None:
     """Set up Otodata sensors based on a config entry."""
     coordinator = OtodataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
-
-    entities = []
-    
-    # Create sensors for each tank found
-    if coordinator.data and "tanks" in coordinator.data:
-        for idx, tank_data in enumerate(coordinator.data["tanks"]):
-            # Main tank level sensor
-            entities.append(OtodataTankSensor(coordinator, entry, idx))
-            
-            # Gallons remaining sensor
-            entities.append(OtodataTankGallonsSensor(coordinator, entry, idx))
-            
-            # Liters remaining sensor
-            entities.append(OtodataTankLitersSensor(coordinator, entry, idx))
-            
-            # Tank pressure sensor (if available)
-            if tank_data.get("TankLastPressure") is not None:
-                entities.append(OtodataTankPressureSensor(coordinator, entry, idx))
-    
-    # Add propane price sensor if URL is configured
+    # Found by the diagnostics download
+    coordinators = hass.data.setdefault(DATA_COORDINATORS, {})
+    coordinators[entry.entry_id] = coordinator
+
+    @callback
+    def _remove_coordinator() -> None:
+        """Forget the coordinator when the entry unloads."""
+        coordinators.pop(entry.entry_id, None)
+
+    entry.async_on_unload(_remove_coordinator)
+
+    # Pricing runs on its own schedule; never hold up tank setup on eia.gov
+    price_coordinator = None
     if entry.data.get(CONF_PRICING_URL):
-        entities.append(OtodataPropanePriceSensor(coordinator, entry))
+        price_cache = await async_get_price_cache(hass)
+        price_coordinator = OtodataPriceCoordinator(
+            hass, entry, price_cache, coordinator.metrics
+        )
+        entry.async_create_background_task(
+            hass, price_coordinator.async_refresh(), "otodata_price_first_refresh"
+        )
+
+    # Start from the last good snapshot and revalidate in the background,
+    # staggered across entries; only block on the API when there is nothing
+    # usable on disk
+    if await coordinator.async_restore():
+        entry.async_create_background_task(
+            hass, coordinator.async_jittered_refresh(), "otodata_tank_revalidate"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+
+    tank_entities: dict[str, list[OtodataTankEntity]] = {}
+
+    @callback
+    def _async_add_tanks(tank_ids: Iterable[str]) -> None:
+        """Create sensors for tanks that have no entities yet."""
+        entities: list[SensorEntity] = []
+        for tank_id in tank_ids:
+            tank = coordinator.data.tanks[tank_id]
+            tank_entities[tank_id] = _tank_entities(
+                coordinator, entry, tank, price_coordinator
+            )
+            entities.extend(tank_entities[tank_id])
+        if entities:
+            async_add_entities(entities)
+
+    @callback
+    def _async_remove_tanks(tank_ids: Iterable[str]) -> None:
+        """Remove the sensors of tanks that left the account."""
+        registry = er.async_get(hass)
+        for tank_id in tank_ids:
+            _LOGGER.debug("Removing entities for tank %s", tank_id)
+            for entity in tank_entities.pop(tank_id, ()):
+                if entity.registry_entry is not None:
+                    registry.async_remove(entity.entity_id)
+                else:
+                    hass.async_create_task(entity.async_remove())
+
+    fleet_entities: list[OtodataFleetSensor] = []
 
-    async_add_entities(entities)
+    @callback
+    def _async_add_fleet() -> None:
+        """Create the fleet sensors once the entry has more than one tank."""
+        # Fleet totals replace per-tank template loops on multi-tank accounts
+        if fleet_entities or (
+            len(coordinator.data.tanks) < 2 and len(coordinator.accounts) < 2
+        ):
+            return
+        fleet_entities.extend(
+            [
+                OtodataFleetGallonsSensor(coordinator, entry),
+                OtodataFleetAverageLevelSensor(coordinator, entry),
+                OtodataFleetLowestLevelSensor(coordinator, entry),
+                OtodataFleetBelowAlertSensor(coordinator, entry),
+            ]
+        )
+        async_add_entities(fleet_entities)
+
+    @callback
+    def _async_handle_fleet_update() -> None:
+        """Add and remove tank entities as the account changes."""
+        if not coordinator.last_update_success:
+            return
+        if added := coordinator.added_tanks - tank_entities.keys():
+            _async_add_tanks(added)
+            _async_add_fleet()
+        # The coordinator only drops an account's tanks after two empty replies
+        if removed := coordinator.removed_tanks & tank_entities.keys():
+            _async_remove_tanks(removed)
+
+    _async_add_tanks(coordinator.data.tanks)
+    _async_add_fleet()
+    entry.async_on_unload(coordinator.async_add_listener(_async_handle_fleet_update))
+
+    # Refresh timings and API health for troubleshooting
+    async_add_entities(
+        [
+            OtodataRefreshDurationSensor(coordinator, entry),
+            OtodataDataTransferredSensor(coordinator, entry),
+            OtodataRetriesSensor(coordinator, entry),
+            OtodataLastSuccessSensor(coordinator, entry),
+        ]
+    )
 
+    # Add propane price sensor if URL is configured
+    if price_coordinator is not None:
+        async_add_entities([OtodataPropanePriceSensor(price_coordinator, entry)])
 
-class OtodataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Otodata tank data."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Initialize."""
-        self.entry = entry
-        self.session = async_get_clientsession(hass)
-        self.auth = aiohttp.BasicAuth(
-            entry.data[CONF_USERNAME],
-            entry.data[CONF_PASSWORD],
+def _tank_entities(
+    coordinator: OtodataUpdateCoordinator,
+    entry: ConfigEntry,
+    tank: TankReading,
+    price_coordinator: OtodataPriceCoordinator | None,
+) -> list[OtodataTankEntity]:
+    """Return the sensors for one tank."""
+    # Main tank level, gallons remaining and liters remaining sensors
+    entities: list[OtodataTankEntity] = [
+        OtodataTankSensor(coordinator, entry, tank, price_coordinator),
+        OtodataTankGallonsSensor(coordinator, entry, tank),
+        OtodataTankLitersSensor(coordinator, entry, tank),
+    ]
+
+    # Consumption rate and projected days until the alert levels and empty
+    entities.append(OtodataTankConsumptionSensor(coordinator, entry, tank))
+    entities.extend(
+        OtodataTankDaysUntilSensor(coordinator, entry, tank, key, label)
+        for key, label in (
+            ("days_to_notify_1", "Days Until Alert 1"),
+            ("days_to_notify_2", "Days Until Alert 2"),
+            ("days_to_empty", "Days Until Empty"),
         )
+    )
 
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=SCAN_INTERVAL,
+    # Tank pressure sensor (if available)
+    if tank.has_pressure:
+        entities.append(OtodataTankPressureSensor(coordinator, entry, tank))
+
+    # Cost to fill sensor (if pricing is configured)
+    if price_coordinator is not None:
+        entities.append(
+            OtodataTankCostToFillSensor(coordinator, entry, tank, price_coordinator)
         )
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via library."""
-        try:
-            async with async_timeout.timeout(API_TIMEOUT):
-                async with self.session.get(
-                    API_URL,
-                    auth=self.auth,
-                ) as response:
-                    if response.status != 200:
-                        raise UpdateFailed(f"Error communicating with API: {response.status}")
-                    
-                    tanks_data = await response.json()
-                    
-                    result = {"tanks": tanks_data}
-                    
-                    # Fetch propane price if URL is configured
-                    pricing_url = self.entry.data.get(CONF_PRICING_URL)
-                    if pricing_url:
-                        try:
-                            async with async_timeout.timeout(30):
-                                async with self.session.get(pricing_url) as price_response:
-                                    if price_response.status == 200:
-                                        price_html = await price_response.text()
-                                        result["propane_price"] = self._parse_price_from_html(price_html)
-                        except Exception as err:
-                            _LOGGER.warning("Could not fetch propane price: %s", err)
-                            result["propane_price"] = None
-                    
-                    return result
-
-        except aiohttp.ClientError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-
-    def _parse_price_from_html(self, html: str) -> str | None:
-        """Parse propane price from EIA HTML page."""
-        try:
-            # Look for the current price in the third data row
-            import re
-            # This regex looks for price patterns like "$2.45" or "2.45"
-            pattern = r'DataRow.*?Current2.*?\$?([\d.]+)'
-            match = re.search(pattern, html, re.DOTALL)
-            if match:
-                return match.group(1)
-        except Exception as err:
-            _LOGGER.debug("Error parsing propane price: %s", err)
-        return None
+    return entities
 
 
-class OtodataTankSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Neevo Tank level sensor."""
+class OtodataTankEntity(CoordinatorEntity[OtodataUpdateCoordinator]):
+    """Base class for sensors bound to a single tank by its Id."""
 
     def __init__(
         self,
         coordinator: OtodataUpdateCoordinator,
-        entry: ConfigEntry,
-        tank_index: int,
+        tank: TankReading,
     ) -> None:
-        """Initialize the sensor."""
+        """Initialize the entity."""
         super().__init__(coordinator)
-        self._tank_index = tank_index
-        
-        # Get tank ID for unique_id (obfuscated in logs)
-        tank_id = "unknown"
+        self._tank_id = tank.tank_id
+
+    @property
+    def tank(self) -> TankReading | None:
+        """Return this entity's tank from the latest snapshot."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.tanks.get(self._tank_id)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return super().available and self.tank is not None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this entity's tank changed."""
+        changed = self.coordinator.changed_tanks
         if (
-            coordinator.data
-            and "tanks" in coordinator.data
-            and len(coordinator.data["tanks"]) > tank_index
+            changed is None
+            or self._tank_id in changed
+            or not self.coordinator.last_update_success
         ):
-            tank_data = coordinator.data["tanks"][tank_index]
-            tank_id = tank_data.get("Id", "unknown")
-            # Use custom name or serial number for friendly name
-            custom_name = tank_data.get("CustomName")
-            if custom_name:
-                self._attr_name = custom_name
-            else:
-                self._attr_name = f"Neevo Tank {tank_index + 1}"
-        else:
-            self._attr_name = f"Neevo Tank {tank_index + 1}"
-        
-        self._attr_unique_id = f"{entry.entry_id}_tank_{tank_id}"
+            super()._handle_coordinator_update()
+
+
+class OtodataTankSensor(OtodataTankEntity, SensorEntity):
+    """Representation of a Neevo Tank level sensor."""
+
+    # Static details are still shown on the entity but not stored in history
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_TANK_CAPACITY,
+            ATTR_TANK_CAPACITY_LITERS,
+            ATTR_TANK_CAPACITY_GALLONS,
+            ATTR_SERIAL_NUMBER,
+            ATTR_CUSTOM_NAME,
+            ATTR_COMPANY_NAME,
+            ATTR_PRODUCT,
+            ATTR_IS_OWNER,
+            ATTR_NOTIFY_AT_1,
+            ATTR_NOTIFY_AT_2,
+            ATTR_PRESSURE_UNIT,
+        }
+    )
+
+    def __init__(
+        self,
+        coordinator: OtodataUpdateCoordinator,
+        entry: ConfigEntry,
+        tank: TankReading,
+        price_coordinator: OtodataPriceCoordinator | None = None,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, tank)
+        self._price_coordinator = price_coordinator
+
+        # Use custom name from the Nee-Vo app if set
+        self._attr_name = tank.custom_name or f"Neevo Tank {tank.position}"
+        self._attr_unique_id = f"{entry.entry_id}_tank_{tank.tank_id}"
         self._attr_native_unit_of_measurement = PERCENTAGE
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_icon = "mdi:propane-tank"
 
+    async def async_added_to_hass(self) -> None:
+        """Also update when the propane price attribute changes."""
+        await super().async_added_to_hass()
+        if self._price_coordinator is not None:
+            self.async_on_remove(
+                self._price_coordinator.async_add_listener(self.async_write_ha_state)
+            )
+
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            return tank_data.get("Level")
+        if tank := self.tank:
+            return tank.level
         return None
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def extra_state_attributes(self) -> Mapping[str, Any]:
         """Return the state attributes."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            
-            # Parse the last reading date
-            last_reading = parse_neevo_date(tank_data.get("LastReadingDate"))
-            
-            # Get capacity (API returns in liters)
-            capacity_liters = tank_data.get("TankCapacity")
-            
+        if (tank := self.tank) is None:
+            return {}
+        attrs = tank.attributes
+        # Include the price from the pricing coordinator when configured
+        if self._price_coordinator is not None and self._price_coordinator.data:
+            attrs = {**attrs, ATTR_PROPANE_PRICE: self._price_coordinator.data.price}
+        # Mark readings kept from before a failing refresh
+        if self.coordinator.stale_since is not None:
             attrs = {
-                ATTR_LEVEL: tank_data.get("Level"),
-                ATTR_TANK_CAPACITY: capacity_liters,  # Original from API (liters)
-                "tank_capacity_liters": capacity_liters,  # Explicit liters
-                ATTR_SERIAL_NUMBER: tank_data.get("SerialNumber"),
-                ATTR_CUSTOM_NAME: tank_data.get("CustomName"),
-                ATTR_COMPANY_NAME: tank_data.get("CompanyName"),
-                ATTR_PRODUCT: tank_data.get("Product"),
-                ATTR_IS_OWNER: tank_data.get("IsOwner"),
-                ATTR_NOTIFY_AT_1: tank_data.get("NotifyAt1"),
-                ATTR_NOTIFY_AT_2: tank_data.get("NotifyAt2"),
+                **attrs,
+                ATTR_STALE: True,
+                ATTR_DATA_FETCHED_AT: self.coordinator.data.fetched_at.isoformat(),
             }
-            
-            # Add tank capacity in gallons for clarity
-            if capacity_liters is not None:
-                attrs["tank_capacity_gallons"] = round(capacity_liters / GALLONS_TO_LITERS, 1)
-            
-            # Add formatted last reading date
-            if last_reading:
-                attrs[ATTR_LAST_READING] = last_reading.isoformat()
-            
-            # Add pressure information if available
-            if tank_data.get("TankLastPressure") is not None:
-                pressure = tank_data.get("TankLastPressure")
-                pressure_unit = tank_data.get("TankPressureDisplayUnitSymbol", "kPa")
-                attrs[ATTR_TANK_PRESSURE] = pressure
-                attrs[ATTR_PRESSURE_UNIT] = pressure_unit
-                
-                # Convert kPa to PSI if needed
-                if pressure_unit == "kPa" and pressure is not None:
-                    attrs["tank_pressure_psi"] = round(pressure * KPA_TO_PSI, 2)
-            
-            # Add propane price if available
-            if "propane_price" in self.coordinator.data:
-                attrs[ATTR_PROPANE_PRICE] = self.coordinator.data["propane_price"]
-            
-            return attrs
-        return {}
+        return attrs
 
 
-class OtodataTankPressureSensor(CoordinatorEntity, SensorEntity):
+class OtodataTankPressureSensor(OtodataTankEntity, SensorEntity):
     """Representation of a Neevo Tank pressure sensor."""
 
+    _unrecorded_attributes = frozenset({ATTR_ORIGINAL_UNIT})
+
     def __init__(
         self,
         coordinator: OtodataUpdateCoordinator,
         entry: ConfigEntry,
-        tank_index: int,
+        tank: TankReading,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._tank_index = tank_index
-        
-        # Get tank ID and name
-        tank_id = "unknown"
-        tank_name = f"Tank {tank_index + 1}"
-        if (
-            coordinator.data
-            and "tanks" in coordinator.data
-            and len(coordinator.data["tanks"]) > tank_index
-        ):
-            tank_data = coordinator.data["tanks"][tank_index]
-            tank_id = tank_data.get("Id", "unknown")
-            custom_name = tank_data.get("CustomName")
-            if custom_name:
-                tank_name = custom_name
-        
-        self._attr_unique_id = f"{entry.entry_id}_pressure_{tank_id}"
-        self._attr_name = f"{tank_name} Pressure"
+        super().__init__(coordinator, tank)
+        self._attr_unique_id = f"{entry.entry_id}_pressure_{tank.tank_id}"
+        self._attr_name = f"{tank.name} Pressure"
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_device_class = SensorDeviceClass.PRESSURE
+        # Always PSI as that's what we convert to
+        self._attr_native_unit_of_measurement = UnitOfPressure.PSI
         self._attr_icon = "mdi:gauge"
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            pressure = tank_data.get("TankLastPressure")
-            pressure_unit = tank_data.get("TankPressureDisplayUnitSymbol", "kPa")
-            
-            if pressure is not None:
-                # Convert to PSI for Home Assistant (standard pressure unit)
-                if pressure_unit == "kPa":
-                    return round(pressure * KPA_TO_PSI, 2)
-                else:
-                    return pressure
+        if tank := self.tank:
+            return tank.pressure_psi
         return None
 
     @property
-    def native_unit_of_measurement(self) -> str:
-        """Return the unit of measurement."""
-        # Always return PSI as that's what we convert to
-        return UnitOfPressure.PSI
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def extra_state_attributes(self) -> Mapping[str, Any]:
         """Return the state attributes."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            pressure = tank_data.get("TankLastPressure")
-            pressure_unit = tank_data.get("TankPressureDisplayUnitSymbol", "kPa")
-            
-            attrs = {}
-            if pressure is not None and pressure_unit == "kPa":
-                attrs["pressure_kpa"] = pressure
-                attrs["original_unit"] = pressure_unit
-            
-            return attrs
+        if tank := self.tank:
+            return tank.pressure_attributes
         return {}
 
 
-class OtodataTankGallonsSensor(CoordinatorEntity, SensorEntity):
+class OtodataTankGallonsSensor(OtodataTankEntity, SensorEntity):
     """Representation of a Neevo Tank gallons remaining sensor."""
 
     def __init__(
         self,
         coordinator: OtodataUpdateCoordinator,
         entry: ConfigEntry,
-        tank_index: int,
+        tank: TankReading,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._tank_index = tank_index
-        
-        # Get tank ID and name
-        tank_id = "unknown"
-        tank_name = f"Tank {tank_index + 1}"
-        if (
-            coordinator.data
-            and "tanks" in coordinator.data
-            and len(coordinator.data["tanks"]) > tank_index
-        ):
-            tank_data = coordinator.data["tanks"][tank_index]
-            tank_id = tank_data.get("Id", "unknown")
-            custom_name = tank_data.get("CustomName")
-            if custom_name:
-                tank_name = custom_name
-        
-        self._attr_unique_id = f"{entry.entry_id}_gallons_{tank_id}"
-        self._attr_name = f"{tank_name} Gallons Remaining"
+        super().__init__(coordinator, tank)
+        self._attr_unique_id = f"{entry.entry_id}_gallons_{tank.tank_id}"
+        self._attr_name = f"{tank.name} Gallons Remaining"
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_native_unit_of_measurement = UnitOfVolume.GALLONS
         self._attr_icon = "mdi:gauge"
@@ -394,53 +386,24 @@ class OtodataTankGallonsSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            level = tank_data.get("Level")
-            capacity_liters = tank_data.get("TankCapacity")  # API returns capacity in liters
-            
-            if level is not None and capacity_liters is not None:
-                # Calculate liters remaining first
-                liters_remaining = (level / 100) * capacity_liters
-                # Convert to gallons
-                gallons_remaining = liters_remaining / GALLONS_TO_LITERS
-                return round(gallons_remaining, 1)
+        if tank := self.tank:
+            return tank.gallons_remaining
         return None
 
 
-class OtodataTankLitersSensor(CoordinatorEntity, SensorEntity):
+class OtodataTankLitersSensor(OtodataTankEntity, SensorEntity):
     """Representation of a Neevo Tank liters remaining sensor."""
 
     def __init__(
         self,
         coordinator: OtodataUpdateCoordinator,
         entry: ConfigEntry,
-        tank_index: int,
+        tank: TankReading,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._tank_index = tank_index
-        
-        # Get tank ID and name
-        tank_id = "unknown"
-        tank_name = f"Tank {tank_index + 1}"
-        if (
-            coordinator.data
-            and "tanks" in coordinator.data
-            and len(coordinator.data["tanks"]) > tank_index
-        ):
-            tank_data = coordinator.data["tanks"][tank_index]
-            tank_id = tank_data.get("Id", "unknown")
-            custom_name = tank_data.get("CustomName")
-            if custom_name:
-                tank_name = custom_name
-        
-        self._attr_unique_id = f"{entry.entry_id}_liters_{tank_id}"
-        self._attr_name = f"{tank_name} Liters Remaining"
+        super().__init__(coordinator, tank)
+        self._attr_unique_id = f"{entry.entry_id}_liters_{tank.tank_id}"
+        self._attr_name = f"{tank.name} Liters Remaining"
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_native_unit_of_measurement = UnitOfVolume.LITERS
         self._attr_icon = "mdi:gauge"
@@ -448,29 +411,362 @@ class OtodataTankLitersSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if (
-            self.coordinator.data
-            and "tanks" in self.coordinator.data
-            and len(self.coordinator.data["tanks"]) > self._tank_index
-        ):
-            tank_data = self.coordinator.data["tanks"][self._tank_index]
-            level = tank_data.get("Level")
-            capacity_liters = tank_data.get("TankCapacity")  # API returns capacity in liters
-            
-            if level is not None and capacity_liters is not None:
-                # Capacity is already in liters, just calculate remaining
-                liters_remaining = (level / 100) * capacity_liters
-                return round(liters_remaining, 1)
+        if tank := self.tank:
+            return tank.liters_remaining
         return None
 
 
-class OtodataPropanePriceSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Neevo Propane Price sensor."""
+class OtodataTankConsumptionSensor(OtodataTankEntity, SensorEntity):
+    """Representation of a Neevo Tank's propane consumption rate."""
 
     def __init__(
         self,
         coordinator: OtodataUpdateCoordinator,
         entry: ConfigEntry,
+        tank: TankReading,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, tank)
+        self._attr_unique_id = f"{entry.entry_id}_consumption_{tank.tank_id}"
+        self._attr_name = f"{tank.name} Consumption Rate"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = f"{UnitOfVolume.GALLONS}/{UnitOfTime.DAYS}"
+        self._attr_icon = "mdi:fire"
+
+    @property
+    def estimate(self) -> ConsumptionEstimate | None:
+        """Return this tank's consumption estimate."""
+        return self.coordinator.consumption.estimate(self._tank_id)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if estimate := self.estimate:
+            return estimate.gallons_per_day
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (estimate := self.estimate) is None:
+            return {}
+        return {
+            ATTR_LITERS_PER_DAY: estimate.liters_per_day,
+            ATTR_PERCENT_PER_DAY: estimate.percent_per_day,
+        }
+
+
+class OtodataTankDaysUntilSensor(OtodataTankEntity, SensorEntity):
+    """Representation of the projected days until a Neevo Tank reaches a level."""
+
+    def __init__(
+        self,
+        coordinator: OtodataUpdateCoordinator,
+        entry: ConfigEntry,
+        tank: TankReading,
+        key: str,
+        label: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, tank)
+        self._key = key
+        self._attr_unique_id = f"{entry.entry_id}_{key}_{tank.tank_id}"
+        self._attr_name = f"{tank.name} {label}"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.DAYS
+        self._attr_icon = "mdi:calendar-clock"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if estimate := self.coordinator.consumption.estimate(self._tank_id):
+            return getattr(estimate, self._key)
+        return None
+
+
+class OtodataFleetSensor(CoordinatorEntity[OtodataUpdateCoordinator], SensorEntity):
+    """Base class for sensors summarizing every tank of an entry."""
+
+    def __init__(
+        self,
+        coordinator: OtodataUpdateCoordinator,
+        entry: ConfigEntry,
+        key: str,
+        name: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_fleet_{key}"
+        self._attr_name = name
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def fleet(self) -> FleetSummary | None:
+        """Return the summary from the latest snapshot."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.fleet
+
+    def _tank_name(self, tank_id: str) -> str:
+        """Return the display name of a tank in the snapshot."""
+        if tank := self.coordinator.data.tanks.get(tank_id):
+            return tank.name
+        return tank_id
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if some tank changed."""
+        changed = self.coordinator.changed_tanks
+        if changed is None or changed or not self.coordinator.last_update_success:
+            super()._handle_coordinator_update()
+
+
+class OtodataFleetGallonsSensor(OtodataFleetSensor):
+    """Representation of the propane on hand across every tank."""
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "gallons", "Fleet Gallons Remaining")
+        self._attr_native_unit_of_measurement = UnitOfVolume.GALLONS
+        self._attr_icon = "mdi:propane-tank"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if fleet := self.fleet:
+            return fleet.gallons
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (fleet := self.fleet) is None:
+            return {}
+        return {
+            ATTR_LITERS: fleet.liters,
+            ATTR_CAPACITY_LITERS: fleet.capacity_liters,
+            ATTR_FILL_PERCENT: fleet.fill_percent,
+        }
+
+
+class OtodataFleetAverageLevelSensor(OtodataFleetSensor):
+    """Representation of the average fill level across every tank."""
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "average_level", "Fleet Average Level")
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_icon = "mdi:gauge"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if fleet := self.fleet:
+            return fleet.average_level
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (fleet := self.fleet) is None:
+            return {}
+        # The capacity-weighted level, next to the plain mean of the state
+        return {
+            ATTR_FILL_PERCENT: fleet.fill_percent,
+            ATTR_TANKS_REPORTING: fleet.reporting,
+        }
+
+
+class OtodataFleetLowestLevelSensor(OtodataFleetSensor):
+    """Representation of the lowest tank level in the fleet."""
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "lowest_level", "Fleet Lowest Level")
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_icon = "mdi:gauge-low"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if fleet := self.fleet:
+            return fleet.lowest_level
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (fleet := self.fleet) is None or fleet.lowest_tank_id is None:
+            return {}
+        return {
+            ATTR_TANK_ID: fleet.lowest_tank_id,
+            ATTR_TANK_NAME: self._tank_name(fleet.lowest_tank_id),
+        }
+
+
+class OtodataFleetBelowAlertSensor(OtodataFleetSensor):
+    """Representation of how many tanks are at or below their first alert level."""
+
+    # Can list every tank on a large account; shown but not recorded
+    _unrecorded_attributes = frozenset({ATTR_TANKS})
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "below_alert_1", "Fleet Tanks Below Alert 1")
+        self._attr_icon = "mdi:propane-tank-outline"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the state of the sensor."""
+        if fleet := self.fleet:
+            return len(fleet.below_notify_1)
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (fleet := self.fleet) is None:
+            return {}
+        return {ATTR_TANKS: [self._tank_name(t) for t in fleet.below_notify_1]}
+
+
+class OtodataDiagnosticSensor(CoordinatorEntity[OtodataUpdateCoordinator], SensorEntity):
+    """Base class for an entry's refresh diagnostic sensors."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: OtodataUpdateCoordinator,
+        entry: ConfigEntry,
+        key: str,
+        name: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_name = name
+
+    @property
+    def metrics(self) -> RefreshMetrics:
+        """Return the entry's refresh metrics."""
+        return self.coordinator.metrics
+
+    @property
+    def available(self) -> bool:
+        """Stay available while refreshes fail; that is when these matter."""
+        return True
+
+
+class OtodataRefreshDurationSensor(OtodataDiagnosticSensor):
+    """Representation of how long the latest tank refresh took."""
+
+    # The percentiles change on every refresh; the state is the history
+    _unrecorded_attributes = frozenset(
+        f"{stage}_{stat}" for stage in STAGES for stat in ("p50_ms", "p95_ms")
+    )
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "refresh_duration", "Refresh Duration")
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_icon = "mdi:timer-outline"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if (seconds := self.metrics.last(STAGE_REFRESH)) is None:
+            return None
+        return round(seconds * 1000, 1)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the rolling percentiles of every stage."""
+        attrs: dict[str, Any] = {}
+        for stage in STAGES:
+            if (stats := self.metrics.percentiles(stage)) is not None:
+                attrs[f"{stage}_p50_ms"] = stats["p50_ms"]
+                attrs[f"{stage}_p95_ms"] = stats["p95_ms"]
+        return attrs
+
+
+class OtodataDataTransferredSensor(OtodataDiagnosticSensor):
+    """Representation of the bytes read from the Otodata and EIA servers."""
+
+    _unrecorded_attributes = frozenset({ATTR_LAST_REFRESH_BYTES})
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "data_transferred", "Data Transferred")
+        self._attr_device_class = SensorDeviceClass.DATA_SIZE
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfInformation.BYTES
+        self._attr_icon = "mdi:download-network"
+
+    @property
+    def native_value(self) -> int:
+        """Return the state of the sensor."""
+        return self.metrics.bytes_total
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        return {ATTR_LAST_REFRESH_BYTES: self.metrics.last_bytes}
+
+
+class OtodataRetriesSensor(OtodataDiagnosticSensor):
+    """Representation of the Otodata requests retried after transient errors."""
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "request_retries", "Request Retries")
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_icon = "mdi:refresh-auto"
+
+    @property
+    def native_value(self) -> int:
+        """Return the state of the sensor."""
+        return self.metrics.retries
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        return {
+            ATTR_FAILED_REFRESHES: self.metrics.failures,
+            ATTR_LAST_ERROR: self.metrics.last_error,
+        }
+
+
+class OtodataLastSuccessSensor(OtodataDiagnosticSensor):
+    """Representation of when tank data was last fetched successfully."""
+
+    def __init__(self, coordinator: OtodataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, "last_success", "Last Successful Refresh")
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+        self._attr_icon = "mdi:clock-check-outline"
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the state of the sensor."""
+        # Survives restarts with the stored snapshot and stays put while stale
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.fetched_at
+
+
+class OtodataPropanePriceSensor(CoordinatorEntity[OtodataPriceCoordinator], SensorEntity):
+    """Representation of a Neevo Propane Price sensor."""
+
+    _unrecorded_attributes = frozenset({ATTR_PRICE_HISTORY_WEEKS})
+
+    def __init__(
+        self,
+        coordinator: OtodataPriceCoordinator,
+        entry: ConfigEntry,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -483,16 +779,66 @@ class OtodataPropanePriceSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if self.coordinator.data and "propane_price" in self.coordinator.data:
-            price_str = self.coordinator.data["propane_price"]
-            if price_str:
-                try:
-                    return float(price_str)
-                except (ValueError, TypeError):
-                    return None
+        if self.coordinator.data:
+            return self.coordinator.data.price
         return None
 
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if self.coordinator.data:
+            return self.coordinator.data.attributes
+        return {}
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
         return self.coordinator.last_update_success and self.native_value is not None
+
+
+class OtodataTankCostToFillSensor(OtodataTankEntity, SensorEntity):
+    """Representation of the estimated cost to fill a Neevo Tank."""
+
+    def __init__(
+        self,
+        coordinator: OtodataUpdateCoordinator,
+        entry: ConfigEntry,
+        tank: TankReading,
+        price_coordinator: OtodataPriceCoordinator,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, tank)
+        self._price_coordinator = price_coordinator
+        self._attr_unique_id = f"{entry.entry_id}_cost_to_fill_{tank.tank_id}"
+        self._attr_name = f"{tank.name} Cost to Fill"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_native_unit_of_measurement = "USD"
+        self._attr_icon = "mdi:cash"
+
+    async def async_added_to_hass(self) -> None:
+        """Also update when the propane price changes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._price_coordinator.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        tank = self.tank
+        price = self._price_coordinator.data
+        if tank is None or price is None or tank.gallons_to_fill is None:
+            return None
+        return round(tank.gallons_to_fill * price.price, 2)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the state attributes."""
+        if (tank := self.tank) is None:
+            return {}
+        return {ATTR_GALLONS_TO_FILL: tank.gallons_to_fill}
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return super().available and self._price_coordinator.data is not None
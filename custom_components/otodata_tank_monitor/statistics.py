@@ -0,0 +1,168 @@
+"""Recorder long-term statistics for the Otodata Tank Monitor integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+import logging
+import math
+import re
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import PERCENTAGE, UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, GALLONS_TO_LITERS
+from .history import HistoryRange, TankHistoryStore
+from .models import TankReading
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR = 3600
+
+# Statistic kind, unit and name suffix; volumes are derived from the level
+STATISTIC_KINDS = (
+    ("level", PERCENTAGE, "Level"),
+    ("liters", UnitOfVolume.LITERS, "Liters Remaining"),
+    ("gallons", UnitOfVolume.GALLONS, "Gallons Remaining"),
+)
+
+
+def statistic_id(tank_id: str, kind: str) -> str:
+    """Return the external statistic id of one of a tank's series."""
+    slug = re.sub(r"[^a-z0-9]+", "_", tank_id.lower()).strip("_")
+    return f"{DOMAIN}:tank_{slug}_{kind}"
+
+
+def _hour(timestamp: float) -> int:
+    """Return the start of the hour holding an epoch timestamp."""
+    return int(timestamp) - int(timestamp) % SECONDS_PER_HOUR
+
+
+def hourly_statistics(
+    readings: HistoryRange, capacity_liters: float | None
+) -> dict[str, list[StatisticData]]:
+    """Aggregate readings into hourly mean, min and max rows per kind."""
+    hours: dict[int, list[float]] = {}
+    for timestamp, level in zip(readings.timestamps, readings.levels):
+        if math.isnan(level):
+            continue
+        hours.setdefault(_hour(timestamp), []).append(level)
+
+    factors = {"level": 1.0}
+    if capacity_liters is not None:
+        factors["liters"] = capacity_liters / 100
+        factors["gallons"] = capacity_liters / 100 / GALLONS_TO_LITERS
+
+    rows: dict[str, list[StatisticData]] = {kind: [] for kind in factors}
+    # History is ordered by time, so the hours already are
+    for hour, levels in hours.items():
+        start = dt_util.utc_from_timestamp(hour)
+        mean = sum(levels) / len(levels)
+        low = min(levels)
+        high = max(levels)
+        for kind, factor in factors.items():
+            rows[kind].append(
+                StatisticData(
+                    start=start,
+                    mean=round(mean * factor, 1),
+                    min=round(low * factor, 1),
+                    max=round(high * factor, 1),
+                )
+            )
+    return rows
+
+
+class TankStatisticsImporter:
+    """Import each tank's readings as hourly external statistics.
+
+    Rows are built from the tank history files, keyed by LastReadingDate, so
+    readings from before a restart or an outage land in the hour they were
+    taken. Each import starts at the newest hour the recorder already holds;
+    re-importing that hour replaces its row, so nothing is stored twice.
+    Only tanks with a reading in a newer hour are imported, and the recorder
+    and history reads for a whole refresh each run as one executor job.
+    """
+
+    def __init__(self, hass: HomeAssistant, history: TankHistoryStore) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.history = history
+        # Start of the newest imported hour per tank (epoch seconds)
+        self._imported: dict[str, int | None] = {}
+        self._lock = asyncio.Lock()
+
+    async def async_import(self, tanks: Iterable[TankReading]) -> None:
+        """Import the readings of these tanks not yet in the recorder."""
+        if "recorder" not in self.hass.config.components:
+            return
+        async with self._lock:
+            tanks = [tank for tank in tanks if tank.last_reading is not None]
+            if unseeded := [
+                tank.tank_id for tank in tanks if tank.tank_id not in self._imported
+            ]:
+                self._imported.update(
+                    await get_instance(self.hass).async_add_executor_job(
+                        self._last_hours, unseeded
+                    )
+                )
+
+            pending = [
+                tank
+                for tank in tanks
+                if (since := self._imported[tank.tank_id]) is None
+                or _hour(tank.last_reading.timestamp()) > since
+            ]
+            if not pending:
+                return
+            rows = await self.hass.async_add_executor_job(self._build_rows, pending)
+            for tank in pending:
+                self._async_add_tank(tank, rows[tank.tank_id])
+            _LOGGER.debug("Imported statistics for %s tanks", len(pending))
+
+    def _last_hours(self, tank_ids: list[str]) -> dict[str, int | None]:
+        """Return the start of the newest hour stored for each tank."""
+        hours: dict[str, int | None] = {}
+        for tank_id in tank_ids:
+            level_id = statistic_id(tank_id, "level")
+            last = get_last_statistics(self.hass, 1, level_id, False, {"mean"})
+            hours[tank_id] = int(rows[0]["start"]) if (rows := last.get(level_id)) else None
+        return hours
+
+    def _build_rows(
+        self, tanks: list[TankReading]
+    ) -> dict[str, dict[str, list[StatisticData]]]:
+        """Read and aggregate the unimported history of each tank."""
+        return {
+            tank.tank_id: hourly_statistics(
+                self.history.read(tank.tank_id, self._imported[tank.tank_id]),
+                tank.capacity_liters,
+            )
+            for tank in tanks
+        }
+
+    @callback
+    def _async_add_tank(
+        self, tank: TankReading, rows: dict[str, list[StatisticData]]
+    ) -> None:
+        """Queue one tank's rows with the recorder."""
+        for kind, unit, label in STATISTIC_KINDS:
+            if not (statistics := rows.get(kind)):
+                continue
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{tank.name} {label}",
+                source=DOMAIN,
+                statistic_id=statistic_id(tank.tank_id, kind),
+                unit_of_measurement=unit,
+            )
+            async_add_external_statistics(self.hass, metadata, statistics)
+
+        if level_rows := rows.get("level"):
+            self._imported[tank.tank_id] = int(level_rows[-1]["start"].timestamp())